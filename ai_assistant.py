@@ -4,11 +4,8 @@ AI Trading Assistant Module
 Provides intelligent insights, daily summaries, and strategy optimization
 """
 
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 from collections import defaultdict
-import json
 
 class TradingAIAssistant:
     def __init__(self):
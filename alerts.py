@@ -5,7 +5,6 @@ Monitors trading metrics and triggers warnings
 
 import pandas as pd
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 # ===== ALERT THRESHOLDS (can be customized per user) =====
 
@@ -4,9 +4,7 @@ Provides deep insights, correlations, and AI-assisted pattern detection
 """
 
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 # ===== PSYCHOLOGY CORRELATION ANALYSIS =====
 
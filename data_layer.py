@@ -5,8 +5,10 @@ Handles automatic migration from JSON to PostgreSQL
 
 import streamlit as st
 import json
+import hashlib
 import os
 from datetime import datetime
+from functools import lru_cache
 
 # Try to import database functions
 try:
@@ -28,17 +30,47 @@ PRETRADE_ANALYSIS_FILE = "pretrade_analysis.json"
 QUOTES_FILE = "quotes.json"
 MINDSET_CHECKINS_FILE = "mindset_checkins.json"
 
+def default_admin_user():
+    """Default admin account, used when no users exist yet (created_at is taken when it is built)"""
+    return {
+        "id": 0,
+        "username": "admin",
+        "password": os.environ.get('ADMIN_PASSWORD', 'ChangeMe123!'),
+        "display_name": "Admin",
+        "created_at": datetime.now().strftime('%Y-%m-%d')
+    }
+
+# Bounds for the mtime-keyed st.cache_data loaders: an entry for an older file version is never
+# hit again, so keep the current version plus one per key (least recently used evicted first)
+CACHED_FILE_VERSIONS = 2
+# Distinct JSON data files read through the shared loaders
+CACHED_DATA_FILES = 8
+# Users whose per-user slices stay cached at once
+CACHED_ACTIVE_USERS = 50
+
 # ===== JSON FALLBACK FUNCTIONS =====
 
 def json_load(filename):
     """Load data from JSON file"""
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    # Single open instead of exists() + open(): a missing file is just the except branch
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Missing/unreadable file or corrupt JSON (JSONDecodeError is a ValueError)
+        return []
+
+def file_mtime(filename):
+    """Modification time of a file in ns, 0 if it doesn't exist"""
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return 0
+
+@lru_cache(maxsize=8)
+def json_load_cached(filename, mtime):
+    """Load a JSON file once per mtime; callers must copy before mutating"""
+    return json_load(filename)
 
 def sanitize_trade_data(trade):
     """Sanitize trade data to ensure JSON serialization"""
@@ -61,8 +93,34 @@ def sanitize_trade_data(trade):
     
     return sanitized
 
-def json_save(filename, data):
-    """Save data to JSON file with proper serialization"""
+# path -> (mtime_ns, sha256) of the last content this process wrote, to skip no-op rewrites
+# (module state, so it survives Streamlit reruns of the page script)
+LAST_WRITTEN_TEXT = {}
+
+def atomic_write_text(path, text):
+    """Write a data file atomically (temp file + fsync + os.replace); False if it already held text"""
+    digest = hashlib.sha256(text.encode()).digest()
+    # Same content as our last write and nobody touched the file since: nothing to do
+    if LAST_WRITTEN_TEXT.get(path) == (file_mtime(path), digest):
+        return False
+    
+    # Write to a temp file and swap it in, so a crash mid-save can't corrupt the file
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    LAST_WRITTEN_TEXT[path] = (file_mtime(path), digest)
+    return True
+
+def json_save(filename, data, indent=None):
+    """Save data to JSON file with proper serialization (compact unless indent is given)"""
     def json_serializer(obj):
         """Custom JSON serializer for non-serializable objects"""
         if isinstance(obj, datetime):
@@ -72,8 +130,9 @@ def json_save(filename, data):
         else:
             return str(obj)
     
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2, default=json_serializer)
+    text = json.dumps(data, indent=indent, separators=None if indent else (',', ':'), default=json_serializer)
+    if atomic_write_text(filename, text):
+        json_load_cached.cache_clear()
 
 # ===== SMART DATA LAYER FUNCTIONS =====
 
@@ -92,12 +151,11 @@ def load_users():
             pass
     
     # Fallback to JSON
-    users = json_load(USERS_FILE)
+    users = json_load_cached(USERS_FILE, file_mtime(USERS_FILE))
     if not users:
         # Create default admin
-        admin_pass = os.environ.get('ADMIN_PASSWORD', 'ChangeMe123!')
-        return [{"id": 0, "username": "admin", "password": admin_pass, "display_name": "Admin", "created_at": datetime.now().strftime('%Y-%m-%d')}]
-    return users
+        return [default_admin_user()]
+    return [dict(user) for user in users]
 
 def save_users(users):
     """Save users - Database or JSON"""
@@ -111,6 +169,26 @@ def save_users(users):
     
     json_save(USERS_FILE, users)
 
+def update_user_password(user_id, password):
+    """Store a new (hashed) password for one user - Database or JSON"""
+    if use_database():
+        # Single-row UPDATE; never write the database user list to users.json
+        try:
+            db_update_password(user_id, password)
+            return True
+        except Exception as e:
+            st.error(f"DB Error: {e}")
+            return False
+    
+    # Fallback to JSON
+    users = load_users()
+    for user in users:
+        if user['id'] == user_id:
+            user['password'] = password
+            json_save(USERS_FILE, users)
+            return True
+    return False
+
 def register_user(username, password, display_name):
     """Register new user"""
     if use_database():
@@ -133,7 +211,7 @@ def register_user(username, password, display_name):
         if user['username'] == username:
             return False, "Username already exists"
     
-    new_id = max([u['id'] for u in users], default=-1) + 1
+    new_id = max((u['id'] for u in users), default=-1) + 1
     new_user = {
         'id': new_id,
         'username': username,
@@ -147,6 +225,17 @@ def register_user(username, password, display_name):
 
 # ===== TRADE FUNCTIONS =====
 
+@st.cache_data(show_spinner=False, max_entries=CACHED_FILE_VERSIONS)
+def json_load_trades(filename, mtime):
+    """Trades from the JSON file, cached per file version"""
+    return json_load(filename)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def json_load_user_trades(filename, mtime, user_id):
+    """One user's trades from the JSON file, cached per file version and user"""
+    # The file is parsed once per version for all users; a cache hit only copies this user's trades
+    return [t for t in json_load_trades(filename, mtime) if t.get('user_id') == user_id]
+
 def load_trades(user_id=None):
     """Load trades - Database or JSON"""
     if use_database():
@@ -156,10 +245,9 @@ def load_trades(user_id=None):
             st.error(f"DB Error loading trades: {e}")
     
     # Fallback to JSON
-    trades = json_load(TRADES_FILE)
     if user_id is not None:
-        return [t for t in trades if t.get('user_id') == user_id]
-    return trades
+        return json_load_user_trades(TRADES_FILE, file_mtime(TRADES_FILE), user_id)
+    return json_load_trades(TRADES_FILE, file_mtime(TRADES_FILE))
 
 def save_trades(trades):
     """Save trades - Database or JSON"""
@@ -173,18 +261,31 @@ def save_trades(trades):
     sanitized_trades = [sanitize_trade_data(trade) for trade in trades]
     json_save(TRADES_FILE, sanitized_trades)
 
-# ===== ACCOUNT FUNCTIONS =====
+def delete_trade(trade_id):
+    """Delete one trade - Database or JSON"""
+    delete_trades([trade_id])
 
-def load_accounts(user_id=None):
-    """Load accounts - Database or JSON"""
+def delete_trades(trade_ids):
+    """Delete several trades at once (one DELETE, one JSON rewrite) - Database or JSON"""
+    trade_ids = set(trade_ids)
+    if not trade_ids:
+        return
     if use_database():
         try:
-            return db_load_accounts(user_id)
+            db_delete_trades(trade_ids)
         except Exception as e:
-            st.error(f"DB Error loading accounts: {e}")
+            st.error(f"DB Error deleting trades: {e}")
     
-    # Fallback to JSON
-    accounts = json_load(ACCOUNTS_FILE)
+    # Trade IDs are stable: only the deleted trades are dropped, nothing is renumbered
+    trades = json_load(TRADES_FILE)
+    json_save(TRADES_FILE, [t for t in trades if t.get('id') not in trade_ids])
+
+# ===== ACCOUNT FUNCTIONS =====
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def json_load_accounts(filename, mtime, user_id=None):
+    """Accounts from the JSON file (optionally one user's), cached per file version"""
+    accounts = json_load(filename)
     # Add user_id if not present
     for acc in accounts:
         if 'user_id' not in acc:
@@ -192,6 +293,18 @@ def load_accounts(user_id=None):
     
     if user_id is not None:
         accounts = [a for a in accounts if a.get('user_id') == user_id]
+    return accounts
+
+def load_accounts(user_id=None):
+    """Load accounts - Database or JSON"""
+    if use_database():
+        try:
+            return db_load_accounts(user_id)
+        except Exception as e:
+            st.error(f"DB Error loading accounts: {e}")
+    
+    # Fallback to JSON
+    accounts = json_load_accounts(ACCOUNTS_FILE, file_mtime(ACCOUNTS_FILE), user_id)
     
     if not accounts and user_id is not None:
         # Create default account
@@ -222,18 +335,11 @@ def load_settings(user_id=None):
             pass
     
     # Fallback to JSON
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r') as f:
-                settings = json.load(f)
-                if 'currency' not in settings:
-                    settings['currency'] = "$"
-                if 'dark_mode' not in settings:
-                    settings['dark_mode'] = False
-                return settings
-        except:
-            return {"currency": "$", "dark_mode": False}
-    return {"currency": "$", "dark_mode": False}
+    settings = json_load_cached(SETTINGS_FILE, file_mtime(SETTINGS_FILE))
+    settings = dict(settings) if isinstance(settings, dict) else {}
+    settings.setdefault('currency', "$")
+    settings.setdefault('dark_mode', False)
+    return settings
 
 def save_settings(settings, user_id=None):
     """Save settings - Database or JSON"""
@@ -245,7 +351,7 @@ def save_settings(settings, user_id=None):
     
     # Sanitize settings data before saving to JSON
     sanitized_settings = sanitize_trade_data(settings)
-    json_save(SETTINGS_FILE, sanitized_settings)
+    json_save(SETTINGS_FILE, sanitized_settings, indent=2)
 
 # ===== QUOTES FUNCTIONS =====
 
@@ -258,7 +364,7 @@ def load_quotes():
             pass
     
     # Fallback to JSON
-    return json_load(QUOTES_FILE)
+    return [dict(quote) for quote in json_load_cached(QUOTES_FILE, file_mtime(QUOTES_FILE))]
 
 def save_quotes(quotes):
     """Save quotes - Database or JSON"""
@@ -282,7 +388,7 @@ def add_quote(text, author=""):
     
     # Fallback to JSON
     quotes = load_quotes()
-    new_id = max([q['id'] for q in quotes], default=-1) + 1
+    new_id = max((q['id'] for q in quotes), default=-1) + 1
     quote = {
         'id': new_id,
         'text': text,
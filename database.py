@@ -413,6 +413,10 @@ def db_delete_trade(trade_id):
     """Delete a trade"""
     execute_query("DELETE FROM trades WHERE id = %s", (trade_id,))
 
+def db_delete_trades(trade_ids):
+    """Delete several trades in one statement"""
+    execute_query("DELETE FROM trades WHERE id = ANY(%s)", (list(trade_ids),))
+
 # ===== QUOTES FUNCTIONS =====
 
 def db_load_quotes():
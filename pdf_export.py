@@ -4,11 +4,9 @@ Generates professional weekly/monthly trading reports with charts
 """
 
 import io
-from datetime import datetime, timedelta
+from datetime import datetime
 import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from matplotlib.backends.backend_pdf import PdfPages
-import pandas as pd
 import numpy as np
 
 def generate_weekly_report(trades, start_date, end_date, username="Trader"):
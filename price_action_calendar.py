@@ -5,7 +5,6 @@ Provides weekly price action analysis and calendar view per symbol
 
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta, date
 import json
 import os
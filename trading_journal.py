@@ -2,11 +2,28 @@ import streamlit as st
 import pandas as pd
 import json
 import os
+import re
+import shutil
+import base64
+import hashlib
+import hmac
+import heapq
+import time
+from collections import Counter
 from datetime import datetime, timedelta
+from operator import itemgetter
+from zoneinfo import ZoneInfo
+import matplotlib
+matplotlib.use('Agg')  # server-side rendering only, no GUI backend
 import matplotlib.pyplot as plt
 import calendar as cal
 import numpy as np
-from collections import defaultdict
+import plotly.graph_objects as go
+
+# Charts are rasterized on every rerun: render at screen resolution (st.pyplot defaults to 200 dpi)
+# and let Agg drop sub-pixel line vertices and draw long paths in chunks
+FIGURE_DPI = 100
+matplotlib.rcParams.update({'path.simplify_threshold': 0.5, 'agg.path.chunksize': 10000})
 
 # Import price action calendar module
 try:
@@ -15,41 +32,35 @@ try:
 except ImportError:
     PRICE_ACTION_AVAILABLE = False
 
-def safe_plot(data, title, xlabel, ylabel, ax=None):
-    """Safely plot data with error handling"""
-    try:
-        if data is None or len(data) == 0:
-            return False
-        
-        # Ensure data is numeric
-        if hasattr(data, 'values'):
-            data = pd.to_numeric(data.values, errors='coerce')
-        else:
-            data = pd.to_numeric(data, errors='coerce')
-        
-        # Remove NaN values
-        data = data.dropna()
-        
-        if len(data) == 0:
-            return False
-        
-        if ax is None:
-            fig, ax = plt.subplots(figsize=(10, 5))
-        
-        colors = ['#00ff88' if x > 0 else '#ff4444' for x in data]
-        data.plot(kind='bar', ax=ax, color=colors, edgecolor='white', linewidth=1.5)
-        ax.axhline(y=0, color='white', linewidth=1)
-        ax.set_xlabel(xlabel, fontsize=12)
-        ax.set_ylabel(ylabel, fontsize=12)
-        ax.set_title(title, fontsize=14, fontweight='bold')
-        ax.grid(True, alpha=0.3, axis='y', linestyle='--')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        return True
-    except Exception as e:
-        st.error(f"Error creating chart: {str(e)}")
-        return False
+def show_figure(fig):
+    """Render a matplotlib figure and close it (pyplot keeps every open figure alive)"""
+    st.pyplot(fig, dpi=FIGURE_DPI)
+    plt.close(fig)
+
+# Content-keyed chart aggregate caches keep this many most recently used results
+CACHED_CHARTS = 64
+
+def show_pnl_bar_chart(data, title, xlabel, ylabel):
+    """Show a green/red P&L bar chart (nothing if there is no numeric data)"""
+    # Plotly sends the bars as JSON and the browser draws them; bar order is kept as given
+    data = pd.to_numeric(pd.Series(data), errors='coerce').dropna()
+    if len(data) == 0:
+        return
+    values = data.to_numpy()
+    fig = go.Figure(go.Bar(
+        x=data.index.astype(str),
+        y=values,
+        marker_color=np.where(values > 0, '#00ff88', '#ff4444'),
+        marker_line_color='white',
+        marker_line_width=1.5
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=xlabel,
+        yaxis_title=ylabel,
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
 
 # Import analytics module
 try:
@@ -134,14 +145,23 @@ try:
 except Exception as e:
     MENTOR_SYSTEM_AVAILABLE = False
 
+# File helpers and cache bounds shared with the data layer (one no-op-write memo for every writer)
+from data_layer import (
+    atomic_write_text, file_mtime, default_admin_user,
+    CACHED_FILE_VERSIONS, CACHED_DATA_FILES, CACHED_ACTIVE_USERS
+)
+
 # Import data layer (handles Database or JSON fallback)
 try:
     from data_layer import (
         load_users as dl_load_users,
         save_users as dl_save_users,
         register_user as dl_register_user,
+        update_user_password as dl_update_user_password,
         load_trades as dl_load_trades,
         save_trades as dl_save_trades,
+        delete_trade as dl_delete_trade,
+        delete_trades as dl_delete_trades,
         load_accounts as dl_load_accounts,
         save_accounts as dl_save_accounts,
         load_settings as dl_load_settings,
@@ -168,12 +188,204 @@ AVOIDED_TRADES_FILE = "avoided_trades.json"
 PRETRADE_ANALYSIS_FILE = "pretrade_analysis.json"
 QUOTES_FILE = "quotes.json"
 MINDSET_CHECKINS_FILE = "mindset_checkins.json"
+USER_DATA_DIR = "data"
+# Legacy global files -> per-user data kind (data/{kind}/{user_id}.jsonl)
+LEGACY_USER_DATA_FILES = {
+    MISTAKES_FILE: "mistakes",
+    AVOIDED_TRADES_FILE: "avoided_trades",
+    PRETRADE_ANALYSIS_FILE: "pretrade_analysis",
+    MINDSET_CHECKINS_FILE: "mindset_checkins"
+}
 ACCOUNT_SIZE = 10000  # Default account size for R-multiple calculation
+NL_TZ = ZoneInfo('Europe/Amsterdam')
+
+# Defaults for fields missing on legacy trades (user_id 0 = pre multi-user data)
+TRADE_DEFAULTS = {
+    'account_id': 0,
+    'user_id': 0,
+    'trade_type': 'Daytrade',
+    'market_condition': 'Trending',
+    'mood': 'Calm',
+    'focus_level': 3,
+    'stress_level': 3,
+    'sleep_quality': 3,
+    'pre_trade_confidence': 3,
+    'duration_minutes': 0,
+    'influence': ''
+}
+
+# Numeric trade fields, converted to native dtypes once when the trades DataFrame is built
+NUMERIC_TRADE_COLUMNS = [
+    'pnl', 'r_multiple', 'entry_price', 'exit_price', 'quantity', 'duration_minutes',
+    'focus_level', 'stress_level', 'sleep_quality', 'pre_trade_confidence'
+]
+
+# Display defaults for fields missing on older pre-trade plans (filled in once per file version)
+PRETRADE_DISPLAY_DEFAULTS = {
+    'time': '00:00:00',
+    'symbol': 'N/A',
+    'direction': 'N/A',
+    'entry_plan': 'N/A',
+    'stop_loss': 'N/A',
+    'take_profit': 'N/A',
+    'risk_reward': 'N/A',
+    'confidence': 0,
+    'checklist': '',
+    'executed': False,
+    'trade_id': None
+}
+
+# Repeated text labels, stored as pandas categoricals so groupby/isin/== work on integer codes
+CATEGORICAL_TRADE_COLUMNS = ['symbol', 'side', 'setup', 'mood', 'influence', 'trade_type', 'market_condition']
 
 # App Version
 APP_VERSION = "3.1.0"
 LAST_UPDATE = "15-10-2025 01:36:16"
 
+# ===== JSON FILE HELPERS =====
+
+# Compact separators for machine-read data files; only human-edited files (settings) get indent
+COMPACT_JSON_SEPARATORS = (',', ':')
+
+def atomic_write_json(path, data, indent=None):
+    """Save JSON atomically so a killed app never leaves a half-written file"""
+    atomic_write_text(path, json.dumps(data, indent=indent, separators=None if indent else COMPACT_JSON_SEPARATORS))
+
+def read_json_file(path, default=None):
+    """Read a JSON data file, returning default ([] if not given) when missing or unreadable"""
+    if default is None:
+        default = []
+    # Single open instead of exists() + open(): a missing file is just the except branch
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Missing/unreadable file or corrupt JSON (JSONDecodeError is a ValueError)
+        return default
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_DATA_FILES * CACHED_FILE_VERSIONS)
+def load_json_cached(path, mtime, default=None):
+    """Read a JSON data file once per file version (st.cache_data hands out copies)"""
+    return read_json_file(path, default)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_DATA_FILES * CACHED_FILE_VERSIONS)
+def group_records_by_user(path, mtime, default_user_id=None):
+    """Group the records of a JSON data file by int user_id, cached per file version"""
+    groups = {}
+    for record in read_json_file(path):
+        user_id = record.get('user_id', default_user_id)
+        # Older records may store the id as a string; "1" and 1 are the same user
+        if user_id is not None:
+            user_id = int(user_id)
+        groups.setdefault(user_id, []).append(record)
+    return groups
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_DATA_FILES * CACHED_ACTIVE_USERS)
+def load_user_records(path, mtime, user_id, default_user_id=None):
+    """Records of a single user from a JSON data file, cached per file version"""
+    return group_records_by_user(path, mtime, default_user_id).get(user_id, [])
+
+# ===== PER-USER DATA FILES =====
+# Mistakes, avoided trades, pre-trade plans and check-ins live in data/{kind}/{user_id}.jsonl
+# (one JSON record per line), so loading one user's data never parses anyone else's.
+
+def user_data_path(kind, user_id):
+    """Path of a user's own data file for a record kind (e.g. 'mistakes')"""
+    return os.path.join(USER_DATA_DIR, kind, f"{user_id}.jsonl")
+
+def read_jsonl_file(path):
+    """Read a JSON Lines file, skipping blank or corrupt lines ([] if missing)"""
+    records = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def load_jsonl_cached(path, mtime):
+    """Read a JSON Lines file, cached per file version"""
+    return read_jsonl_file(path)
+
+def write_jsonl_file(path, records):
+    """Rewrite a JSON Lines file atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write_text(path, ''.join(json.dumps(record, separators=COMPACT_JSON_SEPARATORS) + "\n" for record in records))
+
+def append_jsonl_record(path, record):
+    """Append one record to a JSON Lines file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, separators=COMPACT_JSON_SEPARATORS) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def load_user_data(kind, user_id=None):
+    """Load a user's records of a kind, or every user's records if user_id is None"""
+    if user_id is not None:
+        path = user_data_path(kind, user_id)
+        return load_jsonl_cached(path, file_mtime(path))
+    
+    kind_dir = os.path.join(USER_DATA_DIR, kind)
+    try:
+        file_names = sorted(os.listdir(kind_dir))
+    except FileNotFoundError:
+        return []
+    records = []
+    for file_name in file_names:
+        if file_name.endswith('.jsonl'):
+            records.extend(read_jsonl_file(os.path.join(kind_dir, file_name)))
+    return records
+
+def save_user_data(kind, user_id, records):
+    """Save all records of a kind for one user"""
+    write_jsonl_file(user_data_path(kind, user_id), records)
+
+def migrate_to_user_files(legacy_file, kind):
+    """One-shot split of a legacy global JSON file into per-user files"""
+    kind_dir = os.path.join(USER_DATA_DIR, kind)
+    if os.path.isdir(kind_dir):
+        return
+    records = read_json_file(legacy_file)
+    # Group on the int user_id (missing -> 0, like the rest of the app), so 1 and "1" share one file
+    groups = {}
+    for record in records:
+        groups.setdefault(int(record.get('user_id') or 0), []).append(record)
+    # Write the split into a temp dir and rename it into place at the end: data/{kind}/ only
+    # appears complete, so a crash or a concurrent first run never leaves a partial split behind
+    tmp_dir = f"{kind_dir}.tmp.{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        for user_id, user_records in groups.items():
+            write_jsonl_file(os.path.join(tmp_dir, f"{user_id}.jsonl"), user_records)
+        # Never drop records silently: the split must read back every legacy record
+        split_count = sum(len(read_jsonl_file(os.path.join(tmp_dir, name))) for name in os.listdir(tmp_dir))
+        if split_count != len(records):
+            raise ValueError(f"Splitting {legacy_file}: {split_count} of {len(records)} records in the per-user files")
+        os.replace(tmp_dir, kind_dir)
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        # Another process finished the same split first
+        if not (isinstance(e, OSError) and os.path.isdir(kind_dir)):
+            raise
+
+@st.cache_resource(show_spinner=False)
+def migrate_legacy_user_files():
+    """Split the legacy global files once per server process (no-op once data/{kind}/ exists)"""
+    for legacy_file, kind in LEGACY_USER_DATA_FILES.items():
+        migrate_to_user_files(legacy_file, kind)
+
+migrate_legacy_user_files()
+
 # ===== USER MANAGEMENT FUNCTIONS (must be defined before login_page) =====
 
 def load_users():
@@ -181,47 +393,88 @@ def load_users():
     if DATA_LAYER_AVAILABLE:
         return dl_load_users()
     # Fallback
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    admin_pass = os.environ.get('ADMIN_PASSWORD', 'ChangeMe123!')
-    return [{"id": 0, "username": "admin", "password": admin_pass, "display_name": "Admin", "created_at": datetime.now().strftime('%Y-%m-%d')}]
+    users = load_json_cached(USERS_FILE, file_mtime(USERS_FILE))
+    if users:
+        return users
+    return [default_admin_user()]
 
 def save_users(users):
     """Save users - Uses Database or JSON fallback"""
     if DATA_LAYER_AVAILABLE:
         dl_save_users(users)
     else:
-        with open(USERS_FILE, 'w') as f:
-            json.dump(users, f, indent=2)
+        atomic_write_json(USERS_FILE, users)
+    load_users_by_name.clear()
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_FILE_VERSIONS)
+def load_users_by_name(users_mtime):
+    """Map username -> user, cached per version of the users file"""
+    return {u['username']: u for u in load_users()}
+
+def get_users_by_name():
+    """Get the username -> user index (not cached when users live in the database)"""
+    if DATA_LAYER_AVAILABLE and use_database():
+        return {u['username']: u for u in load_users()}
+    return load_users_by_name(file_mtime(USERS_FILE))
+
+# scrypt cost parameters (stored with each hash so they can be raised later)
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+def hash_password(password):
+    """Hash a password with salted scrypt -> 'scrypt$n$r$p$salt$hash'"""
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+    return "$".join([
+        "scrypt", str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P),
+        base64.b64encode(salt).decode(), base64.b64encode(digest).decode()
+    ])
+
+def is_password_hashed(stored):
+    """Check if a stored password is a scrypt hash (legacy accounts store plaintext)"""
+    return isinstance(stored, str) and stored.startswith("scrypt$")
+
+def verify_password(password, stored):
+    """Check a password against a stored hash (or legacy plaintext) in constant time"""
+    if not stored:
+        return False
+    if not is_password_hashed(stored):
+        return hmac.compare_digest(password.encode(), str(stored).encode())
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        candidate = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt),
+                                   n=int(n), r=int(r), p=int(p))
+        return hmac.compare_digest(candidate, base64.b64decode(digest))
+    except (ValueError, TypeError):
+        return False
 
 def authenticate_user(username, password):
     """Authenticate user and return user object if valid"""
-    users = load_users()
-    for user in users:
-        if user['username'] == username and user['password'] == password:
-            return user
-    return None
+    user = get_users_by_name().get(username)
+    if not user or not verify_password(password, user['password']):
+        return None
+    # One-shot migration: replace a legacy plaintext password by its hash
+    if not is_password_hashed(user['password']):
+        change_password(user['id'], password)
+        user['password'] = get_users_by_name().get(username, user)['password']
+    return user
 
 def register_user(username, password, display_name):
     """Register a new user - Uses Database or JSON fallback"""
     if DATA_LAYER_AVAILABLE:
-        return dl_register_user(username, password, display_name)
+        return dl_register_user(username, hash_password(password), display_name)
     
     # Fallback to JSON
-    users = load_users()
-    for user in users:
-        if user['username'] == username:
-            return False, "Username already exists"
+    if username in get_users_by_name():
+        return False, "Username already exists"
     
-    new_id = max([u['id'] for u in users], default=-1) + 1
+    users = load_users()
+    new_id = max((u['id'] for u in users), default=-1) + 1
     new_user = {
         'id': new_id,
         'username': username,
-        'password': password,
+        'password': hash_password(password),
         'display_name': display_name,
         'created_at': datetime.now().strftime('%Y-%m-%d')
     }
@@ -232,11 +485,17 @@ def register_user(username, password, display_name):
 
 def change_password(user_id, new_password):
     """Change password for a user"""
+    if DATA_LAYER_AVAILABLE:
+        # Updates just this user (a database UPDATE in database mode, not a users.json rewrite)
+        updated = dl_update_user_password(user_id, hash_password(new_password))
+        load_users_by_name.clear()
+        return (True, "Password updated successfully") if updated else (False, "User not found")
+    
     users = load_users()
     
     for user in users:
         if user['id'] == user_id:
-            user['password'] = new_password
+            user['password'] = hash_password(new_password)
             save_users(users)
             return True, "Password updated successfully"
     
@@ -244,13 +503,11 @@ def change_password(user_id, new_password):
 
 # ===== LOGIN PAGE =====
 
-def login_page():
-    """Display login page and handle authentication"""
-    
-    st.title("📈 Trading Journal Pro")
-    
-    # ===== IMPORTANT DATABASE MIGRATION NOTICE =====
-    st.markdown("""
+# Mentor share code: TJ-{user_id}-{username_prefix}
+SHARE_CODE_RE = re.compile(r'^TJ-(\d+)-[^-]+$')
+
+# Static login page HTML (built once at import, not on every rerun)
+LOGIN_FEATURES_BANNER_HTML = """
     <div style='background: linear-gradient(135deg, rgba(0, 255, 136, 0.15) 0%, rgba(0, 136, 255, 0.15) 100%);
                 padding: 20px; border-radius: 12px; border-left: 5px solid #00ff88;
                 margin-bottom: 25px; box-shadow: 0 4px 12px rgba(0, 255, 136, 0.2);'>
@@ -278,36 +535,22 @@ def login_page():
             💡 <em>Alle features zijn volledig geïntegreerd en klaar voor gebruik</em>
         </p>
     </div>
-    """, unsafe_allow_html=True)
-    
-    # Display version info on login page
-    from datetime import datetime
-    import pytz
-    
-    # Get current time in NL timezone
-    nl_tz = pytz.timezone('Europe/Amsterdam')
-    current_time_nl = datetime.now(nl_tz).strftime('%H:%M:%S')
-    current_date_nl = datetime.now(nl_tz).strftime('%d-%m-%Y')
-    
-    st.markdown(f"""
+    """
+
+# Version box; only the NL time placeholder is filled in per render
+LOGIN_VERSION_HTML = f"""
     <div style='background-color: rgba(38, 39, 48, 0.5); padding: 15px; border-radius: 10px; 
                 border: 1px solid rgba(250, 250, 250, 0.1); text-align: center; margin-bottom: 20px;'>
         <p style='margin: 0; font-size: 14px;'>
             <strong>Version {APP_VERSION}</strong> | Last Updated: {LAST_UPDATE}
         </p>
         <p style='margin: 5px 0 0 0; font-size: 12px; opacity: 0.7;'>
-            🕐 NL Time: {current_date_nl} {current_time_nl}
+            🕐 NL Time: {{nl_time}}
         </p>
     </div>
-    """, unsafe_allow_html=True)
-    
-    # Feature Highlights
-    st.markdown("### ✨ Latest Features")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
+    """
+
+LOGIN_CARD_PRICE_ACTION_HTML = """
         <div style='background-color: rgba(38, 39, 48, 0.5); padding: 15px; border-radius: 10px; 
                     border: 1px solid rgba(0, 255, 136, 0.3); height: 180px;'>
             <h4 style='color: #00ff88; margin-top: 0;'>📈 Weekly Price Action</h4>
@@ -316,10 +559,9 @@ def login_page():
                 met automatische pattern classificatie en interactive charts.
             </p>
         </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
+        """
+
+LOGIN_CARD_MISTAKES_HTML = """
         <div style='background-color: rgba(38, 39, 48, 0.5); padding: 15px; border-radius: 10px; 
                     border: 1px solid rgba(255, 136, 0, 0.3); height: 180px;'>
             <h4 style='color: #ff8800; margin-top: 0;'>❌ Mistakes Tracker</h4>
@@ -328,10 +570,9 @@ def login_page():
                 en trend analyse om patronen te herkennen en te leren.
             </p>
         </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
+        """
+
+LOGIN_CARD_WEEKLY_HTML = """
         <div style='background-color: rgba(38, 39, 48, 0.5); padding: 15px; border-radius: 10px; 
                     border: 1px solid rgba(0, 136, 255, 0.3); height: 180px;'>
             <h4 style='color: #0088ff; margin-top: 0;'>📈 Weekly Price Action</h4>
@@ -340,40 +581,9 @@ def login_page():
                 en automatische pattern classificatie voor betere market sentiment.
             </p>
         </div>
-        """, unsafe_allow_html=True)
-    
-    st.write("")
-    
-    # Additional features in compact format
-    with st.expander("🚀 More Features", expanded=False):
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("""
-            **Core Features:**
-            - 📝 Multi-user system with private journals
-            - 💼 Multiple trading accounts
-            - 📅 Calendar view with daily P&L
-            - 🧠 Psychology & mood tracking
-            - 📔 Daily journal notes
-            - 💱 Multi-currency support ($/€)
-            """)
-        
-        with col2:
-            st.markdown("""
-            **Analytics & Charts:**
-            - 📈 Equity curve & drawdown chart
-            - 📊 Monthly performance breakdown
-            - 💰 Profit by symbol analysis
-            - 📅 Best day of week insights
-            - 🎯 R-multiple tracking
-            - 📥 CSV export with filters
-            """)
-    
-    st.markdown("---")
-    
-    # Privacy Disclaimer
-    st.markdown("""
+        """
+
+LOGIN_PRIVACY_DISCLAIMER_HTML = """
     <style>
         .privacy-disclaimer {
             background: linear-gradient(135deg, rgba(255, 136, 0, 0.15) 0%, rgba(255, 68, 68, 0.15) 100%);
@@ -414,7 +624,68 @@ def login_page():
             By logging in or registering, you agree to these terms.
         </p>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+def login_page():
+    """Display login page and handle authentication"""
+    
+    st.title("📈 Trading Journal Pro")
+    
+    # ===== IMPORTANT DATABASE MIGRATION NOTICE =====
+    st.markdown(LOGIN_FEATURES_BANNER_HTML, unsafe_allow_html=True)
+    
+    # Display version info on login page
+    # Get current time in NL timezone (one clock read, formatted once)
+    current_datetime_nl = datetime.now(NL_TZ).strftime('%d-%m-%Y %H:%M:%S')
+    
+    st.markdown(LOGIN_VERSION_HTML.format(nl_time=current_datetime_nl), unsafe_allow_html=True)
+    
+    # Feature Highlights
+    st.markdown("### ✨ Latest Features")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown(LOGIN_CARD_PRICE_ACTION_HTML, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown(LOGIN_CARD_MISTAKES_HTML, unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown(LOGIN_CARD_WEEKLY_HTML, unsafe_allow_html=True)
+    
+    st.write("")
+    
+    # Additional features in compact format
+    with st.expander("🚀 More Features", expanded=False):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("""
+            **Core Features:**
+            - 📝 Multi-user system with private journals
+            - 💼 Multiple trading accounts
+            - 📅 Calendar view with daily P&L
+            - 🧠 Psychology & mood tracking
+            - 📔 Daily journal notes
+            - 💱 Multi-currency support ($/€)
+            """)
+        
+        with col2:
+            st.markdown("""
+            **Analytics & Charts:**
+            - 📈 Equity curve & drawdown chart
+            - 📊 Monthly performance breakdown
+            - 💰 Profit by symbol analysis
+            - 📅 Best day of week insights
+            - 🎯 R-multiple tracking
+            - 📥 CSV export with filters
+            """)
+    
+    st.markdown("---")
+    
+    # Privacy Disclaimer
+    st.markdown(LOGIN_PRIVACY_DISCLAIMER_HTML, unsafe_allow_html=True)
     
     # Create tabs for login, register, and mentor access
     tab1, tab2, tab3 = st.tabs(["🔑 Login", "📝 Register", "👨‍🏫 Mentor Access"])
@@ -479,34 +750,25 @@ def login_page():
         if access_submit:
             if share_code:
                 # Decode share code: TJ-{user_id}-{username_prefix}
-                try:
-                    parts = share_code.strip().upper().split('-')
-                    if len(parts) == 3 and parts[0] == 'TJ':
-                        student_id = int(parts[1])
-                        
-                        # Find user by ID
-                        all_users = load_users()
-                        student_user = None
-                        for u in all_users:
-                            if u['id'] == student_id:
-                                student_user = u
-                                break
-                        
-                        if student_user:
-                            # Create mentor session
-                            st.session_state['user'] = student_user
-                            st.session_state['logged_in'] = True
-                            st.session_state['mentor_mode'] = True
-                            st.session_state['mentor_name'] = mentor_name if mentor_name else "Mentor"
-                            st.rerun()  # Immediate rerun, no success message needed here
-                        else:
-                            st.error("❌ Invalid share code - Student not found")
+                share_match = SHARE_CODE_RE.match(share_code.strip().upper())
+                if share_match:
+                    student_id = int(share_match.group(1))
+                    
+                    # Find user by ID
+                    all_users = load_users()
+                    student_user = next((u for u in all_users if u['id'] == student_id), None)
+                    
+                    if student_user:
+                        # Create mentor session
+                        st.session_state['user'] = student_user
+                        st.session_state['logged_in'] = True
+                        st.session_state['mentor_mode'] = True
+                        st.session_state['mentor_name'] = mentor_name if mentor_name else "Mentor"
+                        st.rerun()  # Immediate rerun, no success message needed here
                     else:
-                        st.error("❌ Invalid share code format. Use format: TJ-X-XXXX")
-                except ValueError:
-                    st.error("❌ Invalid share code - User ID must be a number")
-                except Exception as e:
-                    st.error("❌ Invalid share code format. Please check and try again.")
+                        st.error("❌ Invalid share code - Student not found")
+                else:
+                    st.error("❌ Invalid share code format. Use format: TJ-X-XXXX")
             else:
                 st.error("❌ Please enter a share code")
         
@@ -545,131 +807,118 @@ def load_settings():
         return dl_load_settings()
     
     # Fallback to JSON
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, 'r') as f:
-                settings = json.load(f)
-                if 'currency' not in settings:
-                    settings['currency'] = "$"
-                if 'dark_mode' not in settings:
-                    settings['dark_mode'] = False
-                return settings
-        except:
-            return {"currency": "$", "dark_mode": False}
-    return {"currency": "$", "dark_mode": False}
+    settings = load_json_cached(SETTINGS_FILE, file_mtime(SETTINGS_FILE), {})
+    if not isinstance(settings, dict):
+        settings = {}
+    settings.setdefault('currency', "$")
+    settings.setdefault('dark_mode', False)
+    return settings
 
 def save_settings(settings):
     """Save app settings - Uses Database or JSON fallback"""
     if DATA_LAYER_AVAILABLE:
         dl_save_settings(settings)
     else:
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(settings, f, indent=2)
+        atomic_write_json(SETTINGS_FILE, settings, indent=2)
 
 # ===== MISTAKES MANAGEMENT =====
 
 def load_mistakes(user_id=None):
-    """Load mistakes from JSON file"""
-    if os.path.exists(MISTAKES_FILE):
-        try:
-            with open(MISTAKES_FILE, 'r') as f:
-                mistakes = json.load(f)
-                if user_id is not None:
-                    return [m for m in mistakes if m.get('user_id') == user_id]
-                return mistakes
-        except:
-            return []
-    return []
-
-def save_mistakes(mistakes):
-    """Save mistakes to JSON file"""
-    with open(MISTAKES_FILE, 'w') as f:
-        json.dump(mistakes, f, indent=2)
+    """Load mistakes (one user's file, or all users if user_id is None)"""
+    return load_user_data('mistakes', user_id)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def load_sorted_mistakes(path, mtime):
+    """A user's mistakes newest first, sorted once per file version"""
+    return sorted(read_jsonl_file(path), key=lambda m: (m['date'], m.get('time', '00:00:00')), reverse=True)
+
+def get_sorted_mistakes(user_id):
+    """Mistakes of one user, newest first"""
+    path = user_data_path('mistakes', user_id)
+    return load_sorted_mistakes(path, file_mtime(path))
+
+def save_mistakes(user_id, mistakes):
+    """Save mistakes of one user"""
+    save_user_data('mistakes', user_id, mistakes)
 
 def add_mistake(user_id, mistake_type, description, trade_id=None):
     """Add a new mistake"""
-    mistakes = load_mistakes()
-    new_id = max([m['id'] for m in mistakes], default=-1) + 1
+    mistakes = load_mistakes(user_id)
+    new_id = max((m['id'] for m in mistakes), default=-1) + 1
+    now = datetime.now()
     mistake = {
         'id': new_id,
         'user_id': user_id,
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'time': datetime.now().strftime('%H:%M:%S'),
+        'date': now.strftime('%Y-%m-%d'),
+        'time': now.strftime('%H:%M:%S'),
         'mistake_type': mistake_type,
         'description': description,
         'trade_id': trade_id
     }
-    mistakes.append(mistake)
-    save_mistakes(mistakes)
+    append_jsonl_record(user_data_path('mistakes', user_id), mistake)
     return mistake
 
 # ===== AVOIDED TRADES =====
 
 def load_avoided_trades(user_id=None):
-    """Load avoided trades from JSON file"""
-    if os.path.exists(AVOIDED_TRADES_FILE):
-        try:
-            with open(AVOIDED_TRADES_FILE, 'r') as f:
-                avoided = json.load(f)
-                if user_id is not None:
-                    return [a for a in avoided if a.get('user_id') == user_id]
-                return avoided
-        except:
-            return []
-    return []
-
-def save_avoided_trades(avoided):
-    """Save avoided trades to JSON file"""
-    with open(AVOIDED_TRADES_FILE, 'w') as f:
-        json.dump(avoided, f, indent=2)
+    """Load avoided trades (one user's file, or all users if user_id is None)"""
+    return load_user_data('avoided_trades', user_id)
+
+def save_avoided_trades(user_id, avoided):
+    """Save avoided trades of one user"""
+    save_user_data('avoided_trades', user_id, avoided)
 
 def add_avoided_trade(user_id, symbol, reason, potential_loss=0, notes=""):
     """Add a new avoided trade"""
-    avoided = load_avoided_trades()
-    new_id = max([a['id'] for a in avoided], default=-1) + 1
+    avoided = load_avoided_trades(user_id)
+    new_id = max((a['id'] for a in avoided), default=-1) + 1
+    now = datetime.now()
     trade = {
         'id': new_id,
         'user_id': user_id,
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'time': datetime.now().strftime('%H:%M:%S'),
+        'date': now.strftime('%Y-%m-%d'),
+        'time': now.strftime('%H:%M:%S'),
         'symbol': symbol,
         'reason': reason,
         'potential_loss': potential_loss,
         'notes': notes
     }
-    avoided.append(trade)
-    save_avoided_trades(avoided)
+    append_jsonl_record(user_data_path('avoided_trades', user_id), trade)
     return trade
 
 # ===== PRE-TRADE ANALYSIS =====
 
 def load_pretrade_analysis(user_id=None):
-    """Load pre-trade analysis from JSON file"""
-    if os.path.exists(PRETRADE_ANALYSIS_FILE):
-        try:
-            with open(PRETRADE_ANALYSIS_FILE, 'r') as f:
-                analysis = json.load(f)
-                if user_id is not None:
-                    return [a for a in analysis if a.get('user_id') == user_id]
-                return analysis
-        except:
-            return []
-    return []
-
-def save_pretrade_analysis(analysis):
-    """Save pre-trade analysis to JSON file"""
-    with open(PRETRADE_ANALYSIS_FILE, 'w') as f:
-        json.dump(analysis, f, indent=2)
+    """Load pre-trade analysis (one user's file, or all users if user_id is None)"""
+    return load_user_data('pretrade_analysis', user_id)
+
+def save_pretrade_analysis(user_id, analysis):
+    """Save pre-trade analysis of one user"""
+    save_user_data('pretrade_analysis', user_id, analysis)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def load_pretrade_plans(path, mtime):
+    """A user's pre-trade plans newest first with every display field present, cached per file version"""
+    plans = [{**PRETRADE_DISPLAY_DEFAULTS, **plan} for plan in read_jsonl_file(path)]
+    # 'time' is always present after the defaults, so a C-level itemgetter key works
+    plans.sort(key=itemgetter('date', 'time'), reverse=True)
+    return plans
+
+def get_pretrade_plans(user_id):
+    """Pre-trade plans of one user for display (not for saving back: defaults are filled in)"""
+    path = user_data_path('pretrade_analysis', user_id)
+    return load_pretrade_plans(path, file_mtime(path))
 
 def add_pretrade_analysis(user_id, symbol, direction, entry_plan, stop_loss, take_profit, risk_reward, confidence, checklist):
     """Add a new pre-trade analysis"""
-    analysis = load_pretrade_analysis()
-    new_id = max([a['id'] for a in analysis], default=-1) + 1
+    analysis = load_pretrade_analysis(user_id)
+    new_id = max((a['id'] for a in analysis), default=-1) + 1
+    now = datetime.now()
     pretrade = {
         'id': new_id,
         'user_id': user_id,
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'time': datetime.now().strftime('%H:%M:%S'),
+        'date': now.strftime('%Y-%m-%d'),
+        'time': now.strftime('%H:%M:%S'),
         'symbol': symbol,
         'direction': direction,
         'entry_plan': entry_plan,
@@ -681,10 +930,21 @@ def add_pretrade_analysis(user_id, symbol, direction, entry_plan, stop_loss, tak
         'executed': False,
         'trade_id': None
     }
-    analysis.append(pretrade)
-    save_pretrade_analysis(analysis)
+    append_jsonl_record(user_data_path('pretrade_analysis', user_id), pretrade)
     return pretrade
 
+def mark_pretrade_executed(user_id, plan_id):
+    """Mark a pre-trade plan as executed (used as a button on_click callback)"""
+    analysis = load_pretrade_analysis(user_id)
+    for plan in analysis:
+        if plan['id'] == plan_id:
+            plan['executed'] = True
+    save_pretrade_analysis(user_id, analysis)
+
+def delete_pretrade_analysis(user_id, plan_id):
+    """Delete a pre-trade plan (used as a button on_click callback)"""
+    save_pretrade_analysis(user_id, [p for p in load_pretrade_analysis(user_id) if p['id'] != plan_id])
+
 # ===== QUOTES SYSTEM =====
 
 def load_quotes():
@@ -693,30 +953,42 @@ def load_quotes():
         return dl_load_quotes()
     
     # Fallback to JSON
-    if os.path.exists(QUOTES_FILE):
-        try:
-            with open(QUOTES_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    return load_json_cached(QUOTES_FILE, file_mtime(QUOTES_FILE))
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_FILE_VERSIONS)
+def load_active_quotes(quotes_mtime):
+    """Active quotes, cached per version of the quotes file"""
+    return [q for q in load_quotes() if q.get('active', True)]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_active_db_quotes():
+    """Active quotes from the database (no file version to key on, so cleared on save)"""
+    return [q for q in load_quotes() if q.get('active', True)]
+
+def get_active_quotes():
+    """Get the active quotes"""
+    if DATA_LAYER_AVAILABLE and use_database():
+        return load_active_db_quotes()
+    return load_active_quotes(file_mtime(QUOTES_FILE))
 
 def save_quotes(quotes):
     """Save quotes - Uses Database or JSON fallback"""
     if DATA_LAYER_AVAILABLE:
         dl_save_quotes(quotes)
+        load_active_db_quotes.clear()
     else:
-        with open(QUOTES_FILE, 'w') as f:
-            json.dump(quotes, f, indent=2)
+        atomic_write_json(QUOTES_FILE, quotes)
 
 def add_quote(text, author=""):
     """Add a new quote - Uses Database or JSON fallback"""
     if DATA_LAYER_AVAILABLE:
-        return dl_add_quote(text, author)
+        quote = dl_add_quote(text, author)
+        load_active_db_quotes.clear()
+        return quote
     
     # Fallback to JSON
     quotes = load_quotes()
-    new_id = max([q['id'] for q in quotes], default=-1) + 1
+    new_id = max((q['id'] for q in quotes), default=-1) + 1
     quote = {
         'id': new_id,
         'text': text,
@@ -728,42 +1000,44 @@ def add_quote(text, author=""):
     save_quotes(quotes)
     return quote
 
+def set_quote_active(quote_id, active):
+    """Activate or deactivate a quote (used as a button on_click callback)"""
+    quotes = load_quotes()
+    for quote in quotes:
+        if quote['id'] == quote_id:
+            quote['active'] = active
+    save_quotes(quotes)
+
+def delete_quote(quote_id):
+    """Delete a quote (used as a button on_click callback)"""
+    save_quotes([q for q in load_quotes() if q['id'] != quote_id])
+
 # ===== MINDSET CHECK-INS =====
 
 def load_mindset_checkins(user_id=None):
-    """Load mindset check-ins from JSON file"""
-    if os.path.exists(MINDSET_CHECKINS_FILE):
-        try:
-            with open(MINDSET_CHECKINS_FILE, 'r') as f:
-                checkins = json.load(f)
-                if user_id is not None:
-                    return [c for c in checkins if c.get('user_id') == user_id]
-                return checkins
-        except:
-            return []
-    return []
-
-def save_mindset_checkins(checkins):
-    """Save mindset check-ins to JSON file"""
-    with open(MINDSET_CHECKINS_FILE, 'w') as f:
-        json.dump(checkins, f, indent=2)
+    """Load mindset check-ins (one user's file, or all users if user_id is None)"""
+    return load_user_data('mindset_checkins', user_id)
+
+def save_mindset_checkins(user_id, checkins):
+    """Save mindset check-ins of one user"""
+    save_user_data('mindset_checkins', user_id, checkins)
 
 def add_mindset_checkin(user_id, focus_level, locked_in, emotional_state, notes=""):
     """Add a new mindset check-in"""
-    checkins = load_mindset_checkins()
-    new_id = max([c['id'] for c in checkins], default=-1) + 1
+    checkins = load_mindset_checkins(user_id)
+    new_id = max((c['id'] for c in checkins), default=-1) + 1
+    now = datetime.now()
     checkin = {
         'id': new_id,
         'user_id': user_id,
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'time': datetime.now().strftime('%H:%M:%S'),
+        'date': now.strftime('%Y-%m-%d'),
+        'time': now.strftime('%H:%M:%S'),
         'focus_level': focus_level,
         'locked_in': locked_in,
         'emotional_state': emotional_state,
         'notes': notes
     }
-    checkins.append(checkin)
-    save_mindset_checkins(checkins)
+    append_jsonl_record(user_data_path('mindset_checkins', user_id), checkin)
     return checkin
 
 def load_accounts(user_id=None):
@@ -772,31 +1046,42 @@ def load_accounts(user_id=None):
         return dl_load_accounts(user_id)
     
     # Fallback to JSON
-    if os.path.exists(ACCOUNTS_FILE):
-        try:
-            with open(ACCOUNTS_FILE, 'r') as f:
-                accounts = json.load(f)
-                # Add user_id if not present (legacy data)
-                for acc in accounts:
-                    if 'user_id' not in acc:
-                        acc['user_id'] = 0
-                
-                # Filter by user_id if specified
-                if user_id is not None:
-                    accounts = [a for a in accounts if a.get('user_id') == user_id]
-                
-                return accounts if accounts else [{"name": "Main Account", "size": 10000, "id": 0, "user_id": user_id}]
-        except:
-            return [{"name": "Main Account", "size": 10000, "id": 0, "user_id": user_id if user_id else 0}]
-    return [{"name": "Main Account", "size": 10000, "id": 0, "user_id": user_id if user_id else 0}]
+    if user_id is not None:
+        accounts = load_user_records(ACCOUNTS_FILE, file_mtime(ACCOUNTS_FILE), user_id, default_user_id=0)
+    else:
+        accounts = load_json_cached(ACCOUNTS_FILE, file_mtime(ACCOUNTS_FILE))
+    
+    # Add user_id if not present (legacy data)
+    for acc in accounts:
+        if 'user_id' not in acc:
+            acc['user_id'] = 0
+    
+    return accounts if accounts else [{"name": "Main Account", "size": 10000, "id": 0, "user_id": user_id if user_id else 0}]
 
 def save_accounts(accounts):
     """Save accounts - Uses Database or JSON fallback"""
     if DATA_LAYER_AVAILABLE:
         dl_save_accounts(accounts)
     else:
-        with open(ACCOUNTS_FILE, 'w') as f:
-            json.dump(accounts, f, indent=2)
+        atomic_write_json(ACCOUNTS_FILE, accounts)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_FILE_VERSIONS)
+def load_trades_file(path, mtime):
+    """Trades from the JSON file with legacy defaults filled in, cached per file version"""
+    trades = read_json_file(path)
+    try:
+        # Fill in legacy defaults (unique IDs, account/user, psychology fields);
+        # the dict merge runs in C instead of one setdefault call per field
+        return [{'id': i, **TRADE_DEFAULTS, **trade} for i, trade in enumerate(trades)]
+    except TypeError:
+        # File doesn't hold a list of trade objects
+        return []
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def load_user_trades_file(path, mtime, user_id):
+    """One user's trades from the JSON file, cached per file version and user"""
+    # The file is parsed once per version for all users; a cache hit only copies this user's trades
+    return [t for t in load_trades_file(path, mtime) if t.get('user_id') == user_id]
 
 def load_trades(user_id=None):
     """Load trades - Uses Database or JSON fallback"""
@@ -804,96 +1089,65 @@ def load_trades(user_id=None):
         return dl_load_trades(user_id)
     
     # Fallback to JSON
-    if os.path.exists(TRADES_FILE):
-        try:
-            with open(TRADES_FILE, 'r') as f:
-                trades = json.load(f)
-                # Add unique IDs if they don't exist
-                for i, trade in enumerate(trades):
-                    if 'id' not in trade:
-                        trade['id'] = i
-                    # Add default account_id if not present
-                    if 'account_id' not in trade:
-                        trade['account_id'] = 0
-                    # Add user_id if not present (legacy data)
-                    if 'user_id' not in trade:
-                        trade['user_id'] = 0
-                    # Add default psychological fields if not present
-                    if 'trade_type' not in trade:
-                        trade['trade_type'] = 'Daytrade'
-                    if 'market_condition' not in trade:
-                        trade['market_condition'] = 'Trending'
-                    if 'mood' not in trade:
-                        trade['mood'] = 'Calm'
-                    if 'focus_level' not in trade:
-                        trade['focus_level'] = 3
-                    if 'stress_level' not in trade:
-                        trade['stress_level'] = 3
-                    if 'sleep_quality' not in trade:
-                        trade['sleep_quality'] = 3
-                    if 'pre_trade_confidence' not in trade:
-                        trade['pre_trade_confidence'] = 3
-                    if 'duration_minutes' not in trade:
-                        trade['duration_minutes'] = 0
-                    if 'influence' not in trade:
-                        trade['influence'] = ''
-                
-                # Filter by user_id if specified
-                if user_id is not None:
-                    trades = [t for t in trades if t.get('user_id') == user_id]
-                
-                return trades
-        except:
-            return []
-    return []
+    if user_id is not None:
+        return load_user_trades_file(TRADES_FILE, file_mtime(TRADES_FILE), user_id)
+    return load_trades_file(TRADES_FILE, file_mtime(TRADES_FILE))
 
 def save_trades(trades):
     """Save trades - Uses Database or JSON fallback"""
     if DATA_LAYER_AVAILABLE:
         dl_save_trades(trades)
     else:
-        with open(TRADES_FILE, 'w') as f:
-            json.dump(trades, f, indent=2)
+        atomic_write_json(TRADES_FILE, trades)
 
 def delete_trade(trade_id):
     """Delete a specific trade by ID"""
+    if DATA_LAYER_AVAILABLE:
+        dl_delete_trade(trade_id)
+        return True
+    
+    # Fallback to JSON. IDs are stable (new trades get max id + 1), so the
+    # remaining trades are not renumbered - notes and comments keep pointing at the right trade
+    trades = load_trades()
+    save_trades([t for t in trades if t.get('id') != trade_id])
+    return True
+
+def delete_trades(trade_ids):
+    """Delete several trades by ID with a single save"""
+    if DATA_LAYER_AVAILABLE:
+        dl_delete_trades(trade_ids)
+        return True
+    
+    # Fallback to JSON (remaining trades keep their IDs, see delete_trade)
+    trade_ids = set(trade_ids)
     trades = load_trades()
-    trades = [t for t in trades if t.get('id') != trade_id]
-    # Reassign IDs sequentially
-    for i, trade in enumerate(trades):
-        trade['id'] = i
-    save_trades(trades)
+    save_trades([t for t in trades if t.get('id') not in trade_ids])
     return True
 
 def load_daily_notes(user_id=None):
     """Load daily notes from JSON file"""
-    if os.path.exists(NOTES_FILE):
-        try:
-            with open(NOTES_FILE, 'r') as f:
-                notes = json.load(f)
-                # Filter by user_id if specified
-                if user_id is not None:
-                    notes = [n for n in notes if n.get('user_id') == user_id]
-                return notes
-        except:
-            return []
-    return []
+    if user_id is not None:
+        return load_user_records(NOTES_FILE, file_mtime(NOTES_FILE), user_id)
+    return read_json_file(NOTES_FILE)
 
 def save_daily_notes(notes):
     """Save daily notes to JSON file"""
-    with open(NOTES_FILE, 'w') as f:
-        json.dump(notes, f, indent=2)
+    atomic_write_json(NOTES_FILE, notes)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_FILE_VERSIONS)
+def daily_note_index(path, mtime):
+    """Map (user_id, date) to the position of its note in the notes file, cached per file version"""
+    index = {}
+    for i, note in enumerate(read_json_file(path)):
+        index.setdefault((note.get('user_id'), note['date']), i)
+    return index
 
 def add_daily_note(user_id, date, note_text, mood, energy_level):
     """Add or update a daily note"""
     all_notes = load_daily_notes()
     
     # Check if note for this date and user already exists
-    existing_note = None
-    for i, note in enumerate(all_notes):
-        if note['date'] == date and note.get('user_id') == user_id:
-            existing_note = i
-            break
+    existing_note = daily_note_index(NOTES_FILE, file_mtime(NOTES_FILE)).get((user_id, date))
     
     note_entry = {
         'user_id': user_id,
@@ -914,11 +1168,94 @@ def add_daily_note(user_id, date, note_text, mood, energy_level):
 
 def delete_daily_note(user_id, date):
     """Delete a daily note"""
+    # Nothing to delete means nothing to rewrite
+    if (user_id, date) not in daily_note_index(NOTES_FILE, file_mtime(NOTES_FILE)):
+        return True
     all_notes = load_daily_notes()
     all_notes = [n for n in all_notes if not (n['date'] == date and n.get('user_id') == user_id)]
     save_daily_notes(all_notes)
     return True
 
+# Trade fields in CSV export order -> readable column headers
+TRADE_EXPORT_COLUMNS = {
+    'date': 'Date',
+    'symbol': 'Symbol',
+    'side': 'Side',
+    'entry_price': 'Entry Price',
+    'exit_price': 'Exit Price',
+    'quantity': 'Quantity',
+    'duration_minutes': 'Duration (Minutes)',
+    'setup': 'Setup/Strategy',
+    'influence': 'Influence/Reason',
+    'trade_type': 'Trade Type',
+    'market_condition': 'Market Condition',
+    'mood': 'Mood',
+    'focus_level': 'Focus Level',
+    'stress_level': 'Stress Level',
+    'sleep_quality': 'Sleep Quality',
+    'pre_trade_confidence': 'Pre-Trade Confidence',
+    'notes': 'Notes/Lessons',
+    'pnl': 'PnL',
+    'r_multiple': 'R-Multiple'
+}
+
+def trades_to_export_csv(trades):
+    """CSV text of trades with readable column names (only columns that exist)"""
+    export_df = pd.DataFrame(trades)
+    if 'date' in export_df.columns:
+        export_df['date'] = pd.to_datetime(export_df['date']).dt.strftime('%Y-%m-%d')
+    export_columns = [col for col in TRADE_EXPORT_COLUMNS if col in export_df.columns]
+    return export_df[export_columns].rename(columns=TRADE_EXPORT_COLUMNS).to_csv(index=False)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def load_account_export_csv(user_id, account_id, trades_mtime):
+    """CSV export of one account's trades, built once per version of the trades file"""
+    return trades_to_export_csv([t for t in load_trades(user_id) if t.get('account_id') == account_id])
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS)
+def build_trades_export_csv(trades):
+    """CSV export cached on the trades' content (for data without a file version)"""
+    return trades_to_export_csv(trades)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS)
+def dataframe_to_csv(df):
+    """CSV text of a DataFrame, cached on its content (hashing is far cheaper than serializing)"""
+    return df.to_csv(index=False)
+
+def get_account_export_csv(user_id, account_id, account_trades):
+    """Get the CSV export of an account (keyed on content when trades live in the database)"""
+    if DATA_LAYER_AVAILABLE and use_database():
+        return build_trades_export_csv(account_trades)
+    return load_account_export_csv(user_id, account_id, file_mtime(TRADES_FILE))
+
+def trades_to_frame(trades):
+    """Trades DataFrame, newest first"""
+    df = pd.DataFrame(trades)
+    df['date'] = pd.to_datetime(df['date'])
+    # JSON numbers mixed with None/strings give object columns; make them native float/int once
+    for col in df.columns.intersection(NUMERIC_TRADE_COLUMNS):
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Group by these with observed=True, or categories missing from a filtered subset show up as empty groups
+    for col in df.columns.intersection(CATEGORICAL_TRADE_COLUMNS):
+        df[col] = df[col].astype('category')
+    return df.sort_values('date', ascending=False)
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def load_account_frame(user_id, account_id, trades_mtime):
+    """DataFrame of one account's trades, built once per version of the trades file"""
+    return trades_to_frame([t for t in load_trades(user_id) if t.get('account_id') == account_id])
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_ACTIVE_USERS * CACHED_FILE_VERSIONS)
+def build_trades_frame(trades):
+    """DataFrame of trades cached on the trades' content (for data without a file version)"""
+    return trades_to_frame(trades)
+
+def get_account_frame(user_id, account_id, account_trades):
+    """Get the DataFrame of an account (keyed on content when trades live in the database)"""
+    if DATA_LAYER_AVAILABLE and use_database():
+        return build_trades_frame(account_trades)
+    return load_account_frame(user_id, account_id, file_mtime(TRADES_FILE))
+
 def calculate_pnl(entry, exit, quantity, side):
     """Calculate profit/loss for a trade"""
     if side == "Long":
@@ -932,6 +1269,19 @@ def calculate_r_multiple(pnl, account_size):
     one_r = account_size * 0.01
     return pnl / one_r if one_r > 0 else 0
 
+def calculate_max_drawdown(pnl_sorted):
+    """Max drawdown (absolute and % of peak equity) of a date-sorted pnl array"""
+    if pnl_sorted.size == 0:
+        return 0, 0
+    cumulative = np.cumsum(pnl_sorted)
+    running_max = np.maximum.accumulate(cumulative)
+    peak = running_max[-1]
+    # Turn running_max into the drawdown depth in place, no extra temp array
+    running_max -= cumulative
+    max_drawdown = running_max.max()
+    max_drawdown_pct = (max_drawdown / peak * 100) if peak > 0 else 0
+    return max_drawdown, max_drawdown_pct
+
 def calculate_metrics(df):
     """Calculate trading metrics including advanced metrics"""
     if len(df) == 0:
@@ -988,16 +1338,26 @@ def calculate_metrics(df):
             'max_drawdown_pct': 0
         }
     
-    total_profit = df_clean['pnl'].sum()
-    winning_trades = len(df_clean[df_clean['pnl'] > 0])
-    losing_trades = len(df_clean[df_clean['pnl'] < 0])
-    total_trades = len(df_clean)
+    # One float array, masked once for wins and once for losses, instead of
+    # re-filtering the DataFrame for every statistic
+    pnl = df_clean['pnl'].to_numpy(dtype=np.float64)
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    
+    total_profit = pnl.sum()
+    winning_trades = wins.size
+    losing_trades = losses.size
+    total_trades = pnl.size
     
     win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
     
+    # Gross profit/loss are summed once and reused for the averages below
+    gross_profit = wins.sum() if winning_trades > 0 else 0
+    gross_loss = abs(losses.sum()) if losing_trades > 0 else 0
+    
     # Calculate Expectancy
-    avg_win = df_clean[df_clean['pnl'] > 0]['pnl'].mean() if winning_trades > 0 else 0
-    avg_loss = abs(df_clean[df_clean['pnl'] < 0]['pnl'].mean()) if losing_trades > 0 else 0
+    avg_win = gross_profit / winning_trades if winning_trades > 0 else 0
+    avg_loss = gross_loss / losing_trades if losing_trades > 0 else 0
     
     if total_trades > 0:
         Expectancy = (win_rate/100 * avg_win) - ((1 - win_rate/100) * avg_loss)
@@ -1005,36 +1365,22 @@ def calculate_metrics(df):
         Expectancy = 0
     
     # Calculate Profit Factor
-    gross_profit = df_clean[df_clean['pnl'] > 0]['pnl'].sum() if winning_trades > 0 else 0
-    gross_loss = abs(df_clean[df_clean['pnl'] < 0]['pnl'].sum()) if losing_trades > 0 else 0
     profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else 0
     
     # Calculate Sharpe Ratio (assuming daily returns) - with safe std calculation
-    if len(df_clean) > 1:
-        returns = df_clean['pnl']
-        try:
-            returns_mean = returns.mean()
-            returns_std = returns.std()
-            if pd.notna(returns_std) and returns_std > 0:
-                sharpe_ratio = (returns_mean / returns_std) * (252 ** 0.5)
-            else:
-                sharpe_ratio = 0
-        except Exception:
+    if total_trades > 1:
+        returns_std = pnl.std(ddof=1)
+        if returns_std > 0:
+            sharpe_ratio = (total_profit / total_trades / returns_std) * (252 ** 0.5)
+        else:
             sharpe_ratio = 0
     else:
         sharpe_ratio = 0
     
     # Calculate Max Drawdown - using clean data
     try:
-        df_sorted = df_clean.sort_values('date')
-        cumulative = df_sorted['pnl'].cumsum()
-        running_max = cumulative.cummax()
-        drawdown = cumulative - running_max
-        max_drawdown = abs(drawdown.min()) if len(drawdown) > 0 else 0
-        
-        # Max Drawdown Percentage
-        peak = running_max.max()
-        max_drawdown_pct = (max_drawdown / peak * 100) if peak > 0 else 0
+        order = np.argsort(df_clean['date'].to_numpy(), kind='stable')
+        max_drawdown, max_drawdown_pct = calculate_max_drawdown(pnl[order])
     except Exception:
         max_drawdown = 0
         max_drawdown_pct = 0
@@ -1059,34 +1405,219 @@ def get_daily_stats(df):
     if len(df) == 0:
         return pd.DataFrame()
     
-    daily = df.groupby(df['date'].dt.date).agg({
+    # Group on midnight timestamps (datetime64 keys) instead of Python date objects
+    daily = df.groupby(df['date'].dt.normalize().rename('date')).agg({
         'pnl': ['sum', 'count']
     }).reset_index()
     daily.columns = ['date', 'pnl', 'trades']
-    daily['date'] = pd.to_datetime(daily['date'])
     return daily
 
+@st.cache_data(show_spinner=False, max_entries=CACHED_CHARTS)
 def create_calendar_view(df, year, month):
-    """Create a calendar heatmap view"""
+    """Per-day P&L and trade count for one month, keyed on the int day of month (df needs 'date', 'pnl' and 'symbol')"""
     if len(df) == 0:
         return None
     
-    # Filter for specific month
-    month_data = df[(df['date'].dt.year == year) & (df['date'].dt.month == month)]
+    # Filter for specific month (one datetime64 month comparison instead of year + month)
+    month_data = df[df['date'].to_numpy().astype('datetime64[M]') == np.datetime64(f'{year}-{month:02d}')]
     
     if len(month_data) == 0:
         return None
     
-    # Get daily stats
-    daily_stats = month_data.groupby(month_data['date'].dt.date).agg({
+    # Get daily stats, grouped on the int day of month (what the calendar cells look up)
+    daily_stats = month_data.groupby(month_data['date'].dt.day.rename('day')).agg({
         'pnl': 'sum',
         'symbol': 'count'
     }).reset_index()
-    daily_stats.columns = ['date', 'pnl', 'num_trades']
-    # Don't convert to datetime, keep as date for comparison
+    daily_stats.columns = ['day', 'pnl', 'num_trades']
     
     return daily_stats
 
+CALENDAR_DAY_LABELS = ['Ma', 'Di', 'Wo', 'Do', 'Vr', 'Za', 'Zo']
+
+def calendar_cell_html(day, day_data, currency):
+    """HTML for one calendar cell: blank, a day without trades, or a green/red P&L day"""
+    if day == 0:
+        return "<div></div>"
+    if day_data is None:
+        return (f"<div style='background-color: #1e1e1e; padding: 10px; border-radius: 5px;'>"
+                f"<div style='font-size: 18px; color: #666;'>{day}</div></div>")
+    pnl, num_trades = day_data
+    background, border, color = ('#00ff0030', '#00ff00', '#00ff00') if pnl > 0 else ('#ff000030', '#ff4444', '#ff4444')
+    return (f"<div style='background-color: {background}; padding: 10px; border-radius: 5px; border: 2px solid {border};'>"
+            f"<div style='font-weight: bold; font-size: 20px;'>{day}</div>"
+            f"<div style='color: {color}; font-size: 16px; font-weight: bold;'>{currency}{pnl:.0f}</div>"
+            f"<div style='font-size: 11px;'>{int(num_trades)} trades</div></div>")
+
+def month_calendar_html(month_cal, day_totals, currency):
+    """Month grid (weeks from calendar.monthcalendar) as a single 7-column CSS grid"""
+    header = ''.join(f"<div style='font-weight: bold;'>{label}</div>" for label in CALENDAR_DAY_LABELS)
+    cells = ''.join(calendar_cell_html(day, day_totals.get(day), currency) for week in month_cal for day in week)
+    return f"<div style='display: grid; grid-template-columns: repeat(7, 1fr); gap: 8px;'>{header}{cells}</div>"
+
+# Chart aggregates are cached on the (few) columns they use, so a rerun with unchanged filters skips the groupby
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_CHARTS)
+def equity_curve(df):
+    """Dates, cumulative P&L and drawdown in date order (df needs 'date' and 'pnl'); unparseable P&L counts as 0"""
+    df = df.sort_values('date')
+    cumulative_pnl = np.nancumsum(df['pnl'].to_numpy(dtype=float))
+    drawdown = cumulative_pnl - np.maximum.accumulate(cumulative_pnl)
+    return df['date'].to_numpy(), cumulative_pnl, drawdown
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_CHARTS)
+def monthly_pnl_totals(df):
+    """Total P&L per 'YYYY-MM' month (df needs 'date' and 'pnl')"""
+    return df.groupby(df['date'].dt.to_period('M').astype(str).rename('year_month'))['pnl'].sum().sort_index()
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_CHARTS)
+def day_of_week_stats(df):
+    """Total/average P&L and trade count per weekday, Monday first (df needs 'date' and 'pnl')"""
+    # Group on the int weekday (0 = Monday, sorted by groupby) and only label the at most 7 result rows
+    dow_stats = df.groupby(df['date'].dt.weekday.rename('day_of_week')).agg({
+        'pnl': ['sum', 'mean', 'count']
+    }).round(2)
+    dow_stats.columns = ['Total P&L', 'Avg P&L', 'Trades']
+    dow_stats.index = pd.Index([DAY_ORDER[day] for day in dow_stats.index], name='day_of_week')
+    return dow_stats
+
+@st.cache_data(show_spinner=False, max_entries=CACHED_CHARTS)
+def pnl_stats_by(df, columns):
+    """Column -> total/average P&L and trade count per value, most profitable first (df needs the columns and 'pnl')"""
+    # One cached call (one hash of df) for all columns instead of one per column
+    stats_by_column = {}
+    for column in columns:
+        stats = df.groupby(column, observed=True).agg({
+            'pnl': ['sum', 'mean', 'count']
+        }).round(2)
+        stats.columns = ['Total P&L', 'Avg P&L', 'Number of trades']
+        stats_by_column[column] = stats.sort_values('Total P&L', ascending=False)
+    return stats_by_column
+
+def best_trade(trades_df):
+    """Highest-P&L row of trades_df (one argmax instead of a full sort), or None when it is empty"""
+    if len(trades_df) == 0:
+        return None
+    pnl = trades_df['pnl'].to_numpy(dtype=float)
+    # Like sort_values, unparseable P&L never wins unless it is all there is
+    position = 0 if np.isnan(pnl).all() else int(np.nanargmax(pnl))
+    return trades_df.iloc[position]
+
+# Columns of the trade tables on the All Trades and Per Symbol pages
+TRADE_TABLE_COLUMNS = ['id', 'date', 'symbol', 'side', 'entry_price', 'exit_price', 'quantity', 'result', 'pnl', 'r_multiple', 'setup']
+
+def show_trade_table(trades_df, key, show_symbol=True):
+    """Trades as one st.dataframe plus a single delete selector (instead of a widget row per trade)"""
+    if len(trades_df) == 0:
+        return
+    
+    pnl = trades_df['pnl'].to_numpy()
+    table = trades_df.assign(
+        date=trades_df['date'].dt.strftime('%Y-%m-%d'),
+        result=np.where(pnl > 0, "🟢", "🔴")
+    )
+    columns = [col for col in TRADE_TABLE_COLUMNS if col in table.columns and (show_symbol or col != 'symbol')]
+    st.dataframe(
+        table[columns],
+        column_config={
+            'id': st.column_config.NumberColumn("ID"),
+            'date': "Date",
+            'symbol': "Symbol",
+            'side': "Side",
+            'entry_price': st.column_config.NumberColumn("Entry", format="$%.2f"),
+            'exit_price': st.column_config.NumberColumn("Exit", format="$%.2f"),
+            'quantity': "Qty",
+            'result': "",
+            'pnl': st.column_config.NumberColumn("P&L", format="$%.2f"),
+            'r_multiple': st.column_config.NumberColumn("R", format="%.2fR"),
+            'setup': "Setup"
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    # One selector + button replaces the per-row delete buttons
+    labels = {
+        trade_id: f"#{trade_id} - {date} {symbol} ({pnl_value:.2f})"
+        for trade_id, date, symbol, pnl_value in zip(table['id'], table['date'], table['symbol'], pnl)
+    }
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        # Nothing preselected: a trade is only deleted after the user picks it
+        trade_id = st.selectbox("Trade to delete", list(labels), index=None, placeholder="Choose a trade...",
+                                format_func=labels.get, key=f"{key}_delete_select")
+    with col2:
+        st.markdown(SPACER_HTML, unsafe_allow_html=True)
+        if st.button("🗑️ Delete", key=f"{key}_delete_button", help="Delete the selected trade",
+                     disabled=trade_id is None):
+            if delete_trade(int(trade_id)):
+                # Force fresh data load
+                st.session_state['force_reload'] = True
+                st.success(f"Trade {trade_id} Deleted!")
+                st.rerun()
+
+# st.fragment reruns only the decorated widgets on interaction (Streamlit >= 1.37); plain function before that
+st_fragment = getattr(st, 'fragment', lambda func: func)
+
+@st_fragment
+def admin_debug_user_panel(all_users, currency):
+    """Admin: inspect the trades stored for one user"""
+    with st.expander("🔍 Debug: View Trades by User", expanded=False):
+        debug_user = st.selectbox(
+            "Select user to inspect",
+            all_users,
+            format_func=lambda u: f"{u['username']} (ID: {u['id']}) - {u['display_name']}",
+            key="debug_user_select"
+        )
+        
+        if debug_user:
+            debug_user_id = int(debug_user['id'])
+            debug_user_trades = load_user_records(TRADES_FILE, file_mtime(TRADES_FILE), debug_user_id, default_user_id=0)
+            
+            st.info(f"**User ID:** {debug_user_id} | **Trades found:** {len(debug_user_trades)}")
+            
+            if debug_user_trades:
+                # Show first 5 trades with their user_id
+                st.markdown("**Sample Trades (first 5):**")
+                for i, t in enumerate(debug_user_trades[:5]):
+                    st.text(f"{i+1}. Date: {t.get('date', 'N/A')} | Symbol: {t.get('symbol', 'N/A')} | user_id in trade: {t.get('user_id', 'MISSING')} | P&L: {currency}{t.get('pnl', 0):.2f}")
+            else:
+                st.warning("No trades found for this user. This could mean:\n- User hasn't added any trades yet\n- Trades are assigned to wrong user_id\n- Data synchronization issue")
+
+@st_fragment
+def admin_reset_password_panel(all_users):
+    """Admin: reset the password of any user"""
+    st.subheader("🔑 Reset User Password")
+    
+    # Options are user ids; labels are built once per render and looked up by format_func
+    users_by_id = {u['id']: u for u in all_users}
+    user_labels = {u['id']: f"{u['username']} ({u['display_name']})" for u in all_users}
+    
+    # A form only reruns on submit, not on every keystroke in the password field
+    with st.form("admin_reset_form"):
+        reset_user_id = st.selectbox(
+            "Select User",
+            list(user_labels),
+            format_func=user_labels.get,
+            key="admin_reset_user_id"
+        )
+        user_to_reset = users_by_id.get(reset_user_id)
+        new_pass_admin = st.text_input("New Password", type="password", key="admin_new_pass")
+        
+        submit_reset = st.form_submit_button("🔄 Reset Password", type="primary", use_container_width=True)
+        
+        if submit_reset and user_to_reset:
+            if new_pass_admin and len(new_pass_admin) >= 6:
+                success, message = change_password(user_to_reset['id'], new_pass_admin)
+                if success:
+                    st.success(f"✅ Password reset for {user_to_reset['username']}")
+                else:
+                    st.error(f"❌ {message}")
+            else:
+                st.error("❌ Password must be at least 6 characters")
+
 # Streamlit App
 st.set_page_config(
     page_title="Trading Journal Pro", 
@@ -1099,53 +1630,117 @@ st.set_page_config(
 settings = load_settings()
 dark_mode = settings.get('dark_mode', False)
 
+# Quote banner and check-in alert styles, injected with the app theme CSS
+QUOTE_BANNER_CSS = """
+    @keyframes slideIn {
+        from { transform: translateX(-100%); opacity: 0; }
+        to { transform: translateX(0); opacity: 1; }
+    }
+    .quote-banner {
+        background: linear-gradient(135deg, rgba(0, 255, 136, 0.1) 0%, rgba(0, 136, 255, 0.1) 100%);
+        border-left: 4px solid #00ff88;
+        padding: 15px 20px;
+        border-radius: 8px;
+        margin: 10px 0 20px 0;
+        animation: slideIn 0.8s ease-out;
+        box-shadow: 0 2px 8px rgba(0, 255, 136, 0.2);
+    }
+    .quote-text {
+        font-size: 16px;
+        font-style: italic;
+        margin: 0;
+        color: #e0e0e0;
+    }
+    .quote-author {
+        font-size: 14px;
+        text-align: right;
+        margin-top: 8px;
+        color: #00ff88;
+        font-weight: 600;
+    }
+"""
+
+CHECKIN_ALERT_CSS = """
+    @keyframes pulse {
+        0%, 100% { transform: scale(1); }
+        50% { transform: scale(1.02); }
+    }
+    .checkin-alert {
+        background: linear-gradient(135deg, rgba(255, 136, 0, 0.2) 0%, rgba(255, 68, 68, 0.2) 100%);
+        border: 2px solid #ff8800;
+        padding: 20px;
+        border-radius: 10px;
+        margin: 15px 0;
+        animation: pulse 2s infinite;
+        box-shadow: 0 4px 12px rgba(255, 136, 0, 0.3);
+    }
+    .checkin-title {
+        font-size: 20px;
+        font-weight: bold;
+        color: #ff8800;
+        margin-bottom: 10px;
+    }
+"""
+
+# Theme colors, keyed on the dark_mode setting
+THEME_COLORS = {
+    True: {
+        'bg_color': "#0E1117",
+        'secondary_bg': "#262730",
+        'text_color': "#FAFAFA",
+        'card_bg': "#262730",
+        'border_color': "#38383d",
+        'input_bg': "#262730",
+        'hover_color': "#38383d",
+    },
+    False: {
+        'bg_color': "#FFFFFF",
+        'secondary_bg': "#F0F2F6",
+        'text_color': "#31333F",
+        'card_bg': "#FFFFFF",
+        'border_color': "#D3D3D3",
+        'input_bg': "#FFFFFF",
+        'hover_color': "#E8E8E8",
+    },
+}
+
+# Spacer that lines a button up with the labelled inputs next to it (styled in build_app_css)
+SPACER_HTML = '<div class="widget-spacer"></div>'
+
 # Custom CSS for better styling with dark/light mode support
-if dark_mode:
-    bg_color = "#0E1117"
-    secondary_bg = "#262730"
-    text_color = "#FAFAFA"
-    card_bg = "#262730"
-    border_color = "#38383d"
-    input_bg = "#262730"
-    hover_color = "#38383d"
-else:
-    bg_color = "#FFFFFF"
-    secondary_bg = "#F0F2F6"
-    text_color = "#31333F"
-    card_bg = "#FFFFFF"
-    border_color = "#D3D3D3"
-    input_bg = "#FFFFFF"
-    hover_color = "#E8E8E8"
-
-st.markdown(f"""
+@st.cache_resource(show_spinner=False)
+def build_app_css(dark_mode):
+    """Full app CSS for one theme, formatted once instead of on every rerun"""
+    colors = THEME_COLORS[bool(dark_mode)]
+    return f"""
 <style>
     /* Main background */
     .stApp {{
-        background-color: {bg_color};
-        color: {text_color};
+        background-color: {colors['bg_color']};
+        color: {colors['text_color']};
     }}
     
     /* Sidebar */
     [data-testid="stSidebar"] {{
-        background-color: {secondary_bg};
+        background-color: {colors['secondary_bg']};
     }}
     
     /* Sidebar collapse button - make it visible */
     [data-testid="collapsedControl"] {{
-        color: {text_color} !important;
-        background-color: {card_bg} !important;
-        border: 2px solid {border_color} !important;
+        color: {colors['text_color']} !important;
+        background-color: {colors['card_bg']} !important;
+        border: 2px solid {colors['border_color']} !important;
     }}
     
     [data-testid="collapsedControl"]:hover {{
-        background-color: {hover_color} !important;
-        border-color: {text_color} !important;
+        background-color: {colors['hover_color']} !important;
+        border-color: {colors['text_color']} !important;
     }}
     
     /* All text */
     .stMarkdown, p, span, label, .stTextInput label, .stTextArea label, 
     .stSelectbox label, .stDateInput label, .stNumberInput label {{
-        color: {text_color} !important;
+        color: {colors['text_color']} !important;
     }}
     
     /* Input fields */
@@ -1154,56 +1749,56 @@ st.markdown(f"""
     .stNumberInput > div > div > input,
     .stSelectbox > div > div,
     .stDateInput > div > div > div {{
-        background-color: {input_bg} !important;
-        color: {text_color} !important;
-        border-color: {border_color} !important;
+        background-color: {colors['input_bg']} !important;
+        color: {colors['text_color']} !important;
+        border-color: {colors['border_color']} !important;
     }}
     
     /* Buttons */
     .stButton > button {{
-        background-color: {card_bg};
-        color: {text_color};
-        border: 1px solid {border_color};
+        background-color: {colors['card_bg']};
+        color: {colors['text_color']};
+        border: 1px solid {colors['border_color']};
     }}
     
     .stButton > button:hover {{
-        background-color: {hover_color};
-        border-color: {text_color};
+        background-color: {colors['hover_color']};
+        border-color: {colors['text_color']};
     }}
     
     /* Metrics */
     [data-testid="stMetricValue"] {{
-        color: {text_color} !important;
+        color: {colors['text_color']} !important;
     }}
     
     /* Dataframes */
     .stDataFrame {{
-        background-color: {card_bg};
+        background-color: {colors['card_bg']};
     }}
     
     /* Expanders */
     .streamlit-expanderHeader {{
-        background-color: {card_bg};
-        color: {text_color};
-        border: 1px solid {border_color};
+        background-color: {colors['card_bg']};
+        color: {colors['text_color']};
+        border: 1px solid {colors['border_color']};
     }}
     
     /* Tabs */
     .stTabs [data-baseweb="tab-list"] {{
         gap: 24px;
-        background-color: {secondary_bg};
+        background-color: {colors['secondary_bg']};
     }}
     
     .stTabs [data-baseweb="tab"] {{
         height: 50px;
         padding-left: 20px;
         padding-right: 20px;
-        background-color: {card_bg};
-        color: {text_color};
+        background-color: {colors['card_bg']};
+        color: {colors['text_color']};
     }}
     
     .stTabs [data-baseweb="tab"]:hover {{
-        background-color: {hover_color};
+        background-color: {colors['hover_color']};
     }}
     
     /* Custom classes */
@@ -1218,38 +1813,46 @@ st.markdown(f"""
     }}
     
     .metric-card {{
-        background-color: {card_bg};
+        background-color: {colors['card_bg']};
         padding: 20px;
         border-radius: 10px;
         margin: 10px 0;
-        border: 1px solid {border_color};
+        border: 1px solid {colors['border_color']};
     }}
     
     .version-badge {{
-        background-color: {card_bg};
+        background-color: {colors['card_bg']};
         padding: 8px 12px;
         border-radius: 5px;
-        border: 1px solid {border_color};
+        border: 1px solid {colors['border_color']};
         font-size: 12px;
         text-align: center;
-        color: {text_color};
+        color: {colors['text_color']};
     }}
     
     /* Form containers */
     .stForm {{
-        background-color: {card_bg};
-        border: 1px solid {border_color};
+        background-color: {colors['card_bg']};
+        border: 1px solid {colors['border_color']};
         padding: 20px;
         border-radius: 10px;
     }}
     
     /* Info/Warning/Success boxes */
     .stAlert {{
-        background-color: {card_bg};
-        border: 1px solid {border_color};
+        background-color: {colors['card_bg']};
+        border: 1px solid {colors['border_color']};
+    }}
+    /* Vertical spacer aligning a button with labelled inputs in neighbouring columns */
+    .widget-spacer {{
+        margin-top: 1.75rem;
     }}
+    {QUOTE_BANNER_CSS}
+    {CHECKIN_ALERT_CSS}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(build_app_css(dark_mode), unsafe_allow_html=True)
 
 header_col1, header_col2, header_col3 = st.columns([2, 1, 1])
 
@@ -1262,8 +1865,7 @@ with header_col1:
     """, unsafe_allow_html=True)
 
 with header_col2:
-    st.write("")
-    st.write("")
+    st.markdown(SPACER_HTML, unsafe_allow_html=True)
     theme_col1, theme_col2 = st.columns(2)
     
     with theme_col1:
@@ -1279,8 +1881,7 @@ with header_col2:
             st.rerun()
 
 with header_col3:
-    st.write("")
-    st.write("")
+    st.markdown(SPACER_HTML, unsafe_allow_html=True)
     st.markdown("""
     <style>
         .sidebar-hint {
@@ -1341,8 +1942,7 @@ else:
 st.write("")
 
 # ===== QUOTES SLIDER WITH MANUAL ROTATION =====
-quotes = load_quotes()
-active_quotes = [q for q in quotes if q.get('active', True)]
+active_quotes = get_active_quotes()
 if active_quotes:
     import random
     
@@ -1360,34 +1960,6 @@ if active_quotes:
     with quote_col:
         # Display sliding quote banner
         st.markdown(f"""
-        <style>
-            @keyframes slideIn {{
-                from {{ transform: translateX(-100%); opacity: 0; }}
-                to {{ transform: translateX(0); opacity: 1; }}
-            }}
-            .quote-banner {{
-                background: linear-gradient(135deg, rgba(0, 255, 136, 0.1) 0%, rgba(0, 136, 255, 0.1) 100%);
-                border-left: 4px solid #00ff88;
-                padding: 15px 20px;
-                border-radius: 8px;
-                margin: 10px 0 20px 0;
-                animation: slideIn 0.8s ease-out;
-                box-shadow: 0 2px 8px rgba(0, 255, 136, 0.2);
-            }}
-            .quote-text {{
-                font-size: 16px;
-                font-style: italic;
-                margin: 0;
-                color: #e0e0e0;
-            }}
-            .quote-author {{
-                font-size: 14px;
-                text-align: right;
-                margin-top: 8px;
-                color: #00ff88;
-                font-weight: 600;
-            }}
-        </style>
         <div class="quote-banner">
             <p class="quote-text">"{current_quote['text']}"</p>
             <p class="quote-author">— {current_quote.get('author', 'Trading Wisdom')}</p>
@@ -1397,8 +1969,7 @@ if active_quotes:
     with btn_col:
         # Show next quote button if there are multiple quotes
         if len(active_quotes) > 1:
-            st.write("")
-            st.write("")
+            st.markdown(SPACER_HTML, unsafe_allow_html=True)
             if st.button("🔄", key="rotate_quote", help="Next quote"):
                 st.session_state['current_quote_idx'] = (st.session_state['current_quote_idx'] + 1) % len(active_quotes)
                 st.rerun()
@@ -1408,42 +1979,19 @@ if active_quotes:
         st.caption(f"💬 Quote {quote_idx + 1} of {len(active_quotes)} • Click 🔄 for next")
 
 # ===== 15-MINUTE MINDSET CHECK-IN SYSTEM =====
-# Initialize check-in state
-if 'last_checkin_time' not in st.session_state:
-    st.session_state['last_checkin_time'] = datetime.now()
+CHECKIN_INTERVAL_SECONDS = 900  # 15 minutes
+
+# Initialize check-in state (monotonic seconds: a float compare per rerun, immune to clock changes)
+if 'last_checkin_mono' not in st.session_state:
+    st.session_state['last_checkin_mono'] = time.monotonic()
     st.session_state['show_checkin_alert'] = False
 
 # Check if 15 minutes have passed
-time_since_checkin = datetime.now() - st.session_state['last_checkin_time']
-if time_since_checkin.total_seconds() >= 900:  # 900 seconds = 15 minutes
+if time.monotonic() - st.session_state['last_checkin_mono'] >= CHECKIN_INTERVAL_SECONDS:
     st.session_state['show_checkin_alert'] = True
 
 # Display mindset check-in alert
 if st.session_state.get('show_checkin_alert', False):
-    st.markdown("""
-    <style>
-        @keyframes pulse {{
-            0%, 100% {{ transform: scale(1); }}
-            50% {{ transform: scale(1.02); }}
-        }}
-        .checkin-alert {{
-            background: linear-gradient(135deg, rgba(255, 136, 0, 0.2) 0%, rgba(255, 68, 68, 0.2) 100%);
-            border: 2px solid #ff8800;
-            padding: 20px;
-            border-radius: 10px;
-            margin: 15px 0;
-            animation: pulse 2s infinite;
-            box-shadow: 0 4px 12px rgba(255, 136, 0, 0.3);
-        }}
-        .checkin-title {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #ff8800;
-            margin-bottom: 10px;
-        }}
-    </style>
-    """, unsafe_allow_html=True)
-    
     with st.container():
         st.markdown('<div class="checkin-alert">', unsafe_allow_html=True)
         st.markdown('<div class="checkin-title">⏰ Mindset Check-In Time!</div>', unsafe_allow_html=True)
@@ -1459,13 +2007,13 @@ if st.session_state.get('show_checkin_alert', False):
         
         with col2:
             if st.button("⏰ Herinner me over 5 min", use_container_width=True):
-                st.session_state['last_checkin_time'] = datetime.now() - timedelta(minutes=10)  # Will trigger again in 5 min
+                st.session_state['last_checkin_mono'] = time.monotonic() - 600  # Will trigger again in 5 min
                 st.session_state['show_checkin_alert'] = False
                 st.rerun()
         
         with col3:
             if st.button("❌ Sluiten", use_container_width=True):
-                st.session_state['last_checkin_time'] = datetime.now()
+                st.session_state['last_checkin_mono'] = time.monotonic()
                 st.session_state['show_checkin_alert'] = False
                 st.rerun()
         
@@ -1496,14 +2044,14 @@ if st.session_state.get('open_checkin_form', False):
                 emotional_state=emotional_state,
                 notes=notes
             )
-            st.session_state['last_checkin_time'] = datetime.now()
+            st.session_state['last_checkin_mono'] = time.monotonic()
             st.session_state['open_checkin_form'] = False
             st.success("✅ Mindset check-in opgeslagen!")
             st.rerun()
         
         if cancel_checkin:
             st.session_state['open_checkin_form'] = False
-            st.session_state['last_checkin_time'] = datetime.now()
+            st.session_state['last_checkin_mono'] = time.monotonic()
             st.rerun()
 
 # Force reload data on each run (prevents deleted trades from coming back)
@@ -1513,6 +2061,11 @@ if 'force_reload' in st.session_state:
 # Load existing trades, accounts, and settings for current user
 trades = load_trades(current_user['id'])
 accounts = load_accounts(current_user['id'])
+
+# Group the user's trades by account once; account pages and the sidebar look them up from here
+trades_by_account = {}
+for t in trades:
+    trades_by_account.setdefault(t.get('account_id'), []).append(t)
 settings = load_settings()
 currency = settings.get('currency', '$')
 
@@ -1662,40 +2215,35 @@ with st.sidebar:
             if st.button("🔄 Refresh Stats", use_container_width=True):
                 st.rerun()
             
-            # Force load all data freshly (bypass any caching)
+            # Loaders are cached per file version, so this is always the latest data
             all_users = load_users()
             
-            # Load ALL trades from file directly (no user_id filter)
-            if os.path.exists(TRADES_FILE):
-                with open(TRADES_FILE, 'r') as f:
-                    all_trades_data = json.load(f)
-            else:
-                all_trades_data = []
+            # Load ALL trades from file directly (no user_id filter), parsed once per file version
+            all_trades_data = load_json_cached(TRADES_FILE, file_mtime(TRADES_FILE))
             
             # Debug info
             st.info(f"📊 **Debug Info:** Loaded {len(all_trades_data)} total trades from file | {len(all_users)} registered users")
             
+            # Per-user activity in one groupby over all trades instead of a scan per user
+            trade_counts, trading_days, last_dates = {}, {}, {}
+            if all_trades_data:
+                activity_df = pd.DataFrame(all_trades_data)
+                activity_df['user_id'] = activity_df.get('user_id', pd.Series(0, index=activity_df.index)).fillna(0).astype(int)
+                # Dates are a mix of 'YYYY-MM-DD' and ISO datetimes (sanitize_trade_data); an unparseable one
+                # becomes NaT instead of breaking the whole admin panel
+                activity_df['date'] = pd.to_datetime(activity_df['date'], format='mixed', errors='coerce')
+                by_user = activity_df.groupby('user_id')['date']
+                trade_counts = by_user.size().to_dict()
+                trading_days = activity_df['date'].dt.normalize().groupby(activity_df['user_id']).nunique().to_dict()
+                last_dates = by_user.max().to_dict()
+            
             # Create a DataFrame for better display with activity stats
             users_display = []
             for user in all_users:
-                # Get trades for this user (ensure type matching - convert both to int)
                 user_id = int(user['id'])
-                user_trades = [t for t in all_trades_data if int(t.get('user_id', 0)) == user_id]
-                
-                # Calculate stats
-                num_trades = len(user_trades)
-                
-                if num_trades > 0:
-                    # Count unique trading days
-                    trade_dates = [pd.to_datetime(t['date']).date() for t in user_trades]
-                    unique_days = len(set(trade_dates))
-                    
-                    # Get last activity
-                    latest_trade = max([pd.to_datetime(t['date']) for t in user_trades])
-                    last_activity = latest_trade.strftime('%Y-%m-%d')
-                else:
-                    unique_days = 0
-                    last_activity = 'No activity'
+                num_trades = trade_counts.get(user_id, 0)
+                unique_days = trading_days.get(user_id, 0)
+                last_activity = last_dates[user_id].strftime('%Y-%m-%d') if num_trades > 0 and pd.notna(last_dates[user_id]) else 'No activity'
                 
                 users_display.append({
                     'ID': user['id'],
@@ -1719,66 +2267,21 @@ with st.sidebar:
             with col1:
                 st.metric("Total Users", len(all_users))
             with col2:
-                active_users = len([u for u in users_display if u['Total Trades'] > 0])
+                active_users = int((users_df['Total Trades'] > 0).sum())
                 st.metric("Active Users", active_users)
             with col3:
-                total_trades = sum([u['Total Trades'] for u in users_display])
+                total_trades = int(users_df['Total Trades'].sum())
                 st.metric("Total Trades", total_trades)
             
             st.divider()
             
             # Detailed user breakdown (for debugging)
-            with st.expander("🔍 Debug: View Trades by User", expanded=False):
-                debug_user = st.selectbox(
-                    "Select user to inspect",
-                    all_users,
-                    format_func=lambda u: f"{u['username']} (ID: {u['id']}) - {u['display_name']}",
-                    key="debug_user_select"
-                )
-                
-                if debug_user:
-                    debug_user_id = int(debug_user['id'])
-                    debug_user_trades = [t for t in all_trades_data if int(t.get('user_id', 0)) == debug_user_id]
-                    
-                    st.info(f"**User ID:** {debug_user_id} | **Trades found:** {len(debug_user_trades)}")
-                    
-                    if debug_user_trades:
-                        # Show first 5 trades with their user_id
-                        st.markdown("**Sample Trades (first 5):**")
-                        for i, t in enumerate(debug_user_trades[:5]):
-                            st.text(f"{i+1}. Date: {t.get('date', 'N/A')} | Symbol: {t.get('symbol', 'N/A')} | user_id in trade: {t.get('user_id', 'MISSING')} | P&L: {currency}{t.get('pnl', 0):.2f}")
-                    else:
-                        st.warning("No trades found for this user. This could mean:\n- User hasn't added any trades yet\n- Trades are assigned to wrong user_id\n- Data synchronization issue")
+            admin_debug_user_panel(all_users, currency)
             
             st.divider()
             
             # Reset user password section
-            st.subheader("🔑 Reset User Password")
-            
-            col1, col2 = st.columns([2, 1])
-            with col1:
-                user_to_reset = st.selectbox(
-                    "Select User",
-                    all_users,
-                    format_func=lambda u: f"{u['username']} ({u['display_name']})",
-                    key="admin_reset_user"
-                )
-            
-            with col2:
-                st.write("")
-                st.write("")
-            
-            new_pass_admin = st.text_input("New Password", type="password", key="admin_new_pass")
-            
-            if st.button("🔄 Reset Password", type="primary", use_container_width=True):
-                if new_pass_admin and len(new_pass_admin) >= 6:
-                    success, message = change_password(user_to_reset['id'], new_pass_admin)
-                    if success:
-                        st.success(f"✅ Password reset for {user_to_reset['username']}")
-                    else:
-                        st.error(f"❌ {message}")
-                else:
-                    st.error("❌ Password must be at least 6 characters")
+            admin_reset_password_panel(all_users)
         
         st.divider()
     
@@ -1796,7 +2299,7 @@ with st.sidebar:
             if submit_pass:
                 if old_password and new_password and confirm_password:
                     # Verify old password
-                    if old_password != current_user['password']:
+                    if not verify_password(old_password, current_user['password']):
                         st.error("❌ Current password is incorrect")
                     elif new_password != confirm_password:
                         st.error("❌ New passwords don't match")
@@ -1807,7 +2310,7 @@ with st.sidebar:
                         if success:
                             st.success("✅ Password changed successfully! Please login again.")
                             # Update session
-                            current_user['password'] = new_password
+                            current_user['password'] = get_users_by_name()[current_user['username']]['password']
                             st.session_state['user'] = current_user
                         else:
                             st.error(f"❌ {message}")
@@ -1837,11 +2340,10 @@ with st.sidebar:
     
     # Account selector
     if len(accounts) > 0:
-        account_names = [f"{acc['name']} ({currency}{acc['size']:,.0f})" for acc in accounts]
         selected_account_idx = st.selectbox(
             "Select Account",
             range(len(accounts)),
-            format_func=lambda x: account_names[x],
+            format_func=lambda x: f"{accounts[x]['name']} ({currency}{accounts[x]['size']:,.0f})",
             key="selected_account"
         )
         selected_account = accounts[selected_account_idx]
@@ -1865,7 +2367,7 @@ with st.sidebar:
                 if new_account_name:
                     # Get highest ID across ALL accounts (not just user's)
                     all_accounts = load_accounts()
-                    new_id = max([acc['id'] for acc in all_accounts], default=-1) + 1
+                    new_id = max((acc['id'] for acc in all_accounts), default=-1) + 1
                     accounts.append({
                         "name": new_account_name,
                         "size": new_account_size,
@@ -1908,21 +2410,20 @@ with st.sidebar:
                 )
             
             with col3:
-                st.write("")
-                st.write("")
+                st.markdown(SPACER_HTML, unsafe_allow_html=True)
                 if st.button("💾 Save", key=f"save_{acc['id']}"):
-                    # Update account
-                    for a in accounts:
-                        if a['id'] == acc['id']:
-                            a['name'] = new_name
-                            a['size'] = new_size
-                            # Update all trades with this account
-                            all_trades = load_trades()
-                            for t in all_trades:
-                                if t.get('account_id') == acc['id']:
-                                    t['account_name'] = new_name
-                            save_trades(all_trades)
-                            break
+                    # Update account (acc is the dict inside accounts)
+                    renamed = new_name != acc['name']
+                    acc['name'] = new_name
+                    acc['size'] = new_size
+                    # Trades store the account name too; only rewrite them when it changed
+                    if renamed:
+                        account_id = acc['id']
+                        all_trades = load_trades()
+                        for t in all_trades:
+                            if t.get('account_id') == account_id:
+                                t['account_name'] = new_name
+                        save_trades(all_trades)
                     save_accounts(accounts)
                     st.success(f"✅ Account updated!")
                     st.rerun()
@@ -1939,7 +2440,7 @@ with st.sidebar:
                 with col2:
                     if st.button("🗑️", key=f"del_acc_{acc['id']}", help="Delete account"):
                         # Check if account has trades
-                        account_trades = [t for t in trades if t.get('account_id') == acc['id']]
+                        account_trades = trades_by_account.get(acc['id'], [])
                         if len(account_trades) > 0:
                             st.error(f"Kan niet Deleteen: {len(account_trades)} trades linked")
                         else:
@@ -1958,12 +2459,9 @@ with st.sidebar:
                 st.session_state['confirm_delete_all'] = True
                 st.error("⚠️ Click again to confirm")
             elif st.session_state['confirm_delete_all']:
-                # Delete all trades for this account
-                all_trades = load_trades()
-                all_trades = [t for t in all_trades if t.get('account_id') != selected_account['id']]
-                # Reassign IDs
-                for i, trade in enumerate(all_trades):
-                    trade['id'] = i
+                # Delete all trades for this account (remaining trades keep their IDs)
+                target_account_id = selected_account['id']
+                all_trades = [t for t in load_trades() if t.get('account_id') != target_account_id]
                 save_trades(all_trades)
                 del st.session_state['confirm_delete_all']
                 st.session_state['force_reload'] = True
@@ -1978,10 +2476,8 @@ with st.sidebar:
                 # Reset everything
                 save_trades([])
                 save_accounts([{"name": "Main Account", "size": 10000, "id": 0}])
-                del st.session_state['confirm_reset_all']
-                # Clear all session state
-                for key in list(st.session_state.keys()):
-                    del st.session_state[key]
+                # Clear all session state (includes the confirm_reset_all flag)
+                st.session_state.clear()
                 st.success("✅ Everything reset to default!")
                 st.rerun()
     
@@ -1990,51 +2486,9 @@ with st.sidebar:
     # Export section in sidebar
     st.header("📥 Export")
     if len(trades) > 0:
-        account_trades = [t for t in trades if t.get('account_id') == selected_account['id']]
+        account_trades = trades_by_account.get(selected_account['id'], [])
         if len(account_trades) > 0:
-            # Prepare export dataframe for current account
-            export_df = pd.DataFrame(account_trades)
-            if 'date' in export_df.columns:
-                export_df['date'] = pd.to_datetime(export_df['date']).dt.strftime('%Y-%m-%d')
-            
-            # Select and reorder columns for export
-            export_columns = [
-                'date', 'symbol', 'side', 'entry_price', 'exit_price', 'quantity',
-                'duration_minutes', 'setup', 'influence', 'trade_type', 'market_condition', 
-                'mood', 'focus_level', 'stress_level', 'sleep_quality', 'pre_trade_confidence', 
-                'notes', 'pnl', 'r_multiple'
-            ]
-            
-            # Only include columns that exist
-            export_columns = [col for col in export_columns if col in export_df.columns]
-            export_df = export_df[export_columns]
-            
-            # Rename columns for better readability
-            column_names = {
-                'date': 'Date',
-                'symbol': 'Symbol',
-                'side': 'Side',
-                'entry_price': 'Entry Price',
-                'exit_price': 'Exit Price',
-                'quantity': 'Quantity',
-                'duration_minutes': 'Duration (Minutes)',
-                'setup': 'Setup/Strategy',
-                'influence': 'Influence/Reason',
-                'trade_type': 'Trade Type',
-                'market_condition': 'Market Condition',
-                'mood': 'Mood',
-                'focus_level': 'Focus Level',
-                'stress_level': 'Stress Level',
-                'sleep_quality': 'Sleep Quality',
-                'pre_trade_confidence': 'Pre-Trade Confidence',
-                'notes': 'Notes/Lessons',
-                'pnl': 'PnL',
-                'r_multiple': 'R-Multiple'
-            }
-            export_df = export_df.rename(columns=column_names)
-            
-            # Convert to CSV
-            csv = export_df.to_csv(index=False)
+            csv = get_account_export_csv(current_user['id'], selected_account['id'], account_trades)
             
             # Create filename with account name and date
             safe_account_name = selected_account['name'].replace(' ', '_')
@@ -2064,7 +2518,7 @@ if selected_page == "📝 Add Trade":
         
         if len(trades) > 0:
             # Get recent 10 trades
-            recent_trades_data = sorted(trades, key=lambda x: x.get('date', ''), reverse=True)[:10]
+            recent_trades_data = heapq.nlargest(10, trades, key=lambda x: x.get('date', ''))
             
             for trade in recent_trades_data:
                 # Create detailed expander for each trade
@@ -2075,29 +2529,37 @@ if selected_page == "📝 Add Trade":
                     # Trade details in columns
                     col1, col2, col3 = st.columns(3)
                     
+                    # One multi-line st.text per column instead of one element per field
                     with col1:
                         st.markdown("**📊 Trade Info:**")
-                        st.text(f"Entry: {currency}{trade['entry_price']:.2f}")
-                        st.text(f"Exit: {currency}{trade['exit_price']:.2f}")
-                        st.text(f"Quantity: {trade['quantity']}")
-                        st.text(f"Duration: {trade.get('duration_minutes', 0)} min")
-                        st.text(f"Setup: {trade.get('setup', 'N/A')}")
+                        st.text(
+                            f"Entry: {currency}{trade['entry_price']:.2f}\n"
+                            f"Exit: {currency}{trade['exit_price']:.2f}\n"
+                            f"Quantity: {trade['quantity']}\n"
+                            f"Duration: {trade.get('duration_minutes', 0)} min\n"
+                            f"Setup: {trade.get('setup', 'N/A')}"
+                        )
                     
                     with col2:
                         st.markdown("**🧠 Psychology:**")
-                        st.text(f"Mood: {trade.get('mood', 'N/A')}")
-                        st.text(f"Confidence: {trade.get('pre_trade_confidence', 'N/A')}/5")
-                        st.text(f"Focus: {trade.get('focus_level', 'N/A')}/5")
-                        st.text(f"Stress: {trade.get('stress_level', 'N/A')}/5")
-                        st.text(f"Sleep: {trade.get('sleep_quality', 'N/A')}/5")
+                        st.text(
+                            f"Mood: {trade.get('mood', 'N/A')}\n"
+                            f"Confidence: {trade.get('pre_trade_confidence', 'N/A')}/5\n"
+                            f"Focus: {trade.get('focus_level', 'N/A')}/5\n"
+                            f"Stress: {trade.get('stress_level', 'N/A')}/5\n"
+                            f"Sleep: {trade.get('sleep_quality', 'N/A')}/5"
+                        )
                     
                     with col3:
                         st.markdown("**📌 Context:**")
-                        st.text(f"Type: {trade.get('trade_type', 'N/A')}")
-                        st.text(f"Market: {trade.get('market_condition', 'N/A')}")
+                        context_lines = [
+                            f"Type: {trade.get('trade_type', 'N/A')}",
+                            f"Market: {trade.get('market_condition', 'N/A')}"
+                        ]
                         if trade.get('influence'):
-                            st.text(f"Influence: {trade.get('influence', 'N/A')}")
-                        st.text(f"Account: {trade.get('account_name', 'N/A')}")
+                            context_lines.append(f"Influence: {trade.get('influence', 'N/A')}")
+                        context_lines.append(f"Account: {trade.get('account_name', 'N/A')}")
+                        st.text("\n".join(context_lines))
                     
                     # Notes section
                     if trade.get('notes'):
@@ -2160,7 +2622,7 @@ if selected_page == "📝 Add Trade":
                     
                     # Get next ID (across all trades, not just user's)
                     all_trades = load_trades()
-                    next_id = max([t.get('id', 0) for t in all_trades], default=-1) + 1
+                    next_id = max((t.get('id', 0) for t in all_trades), default=-1) + 1
                     
                     trade = {
                         'id': next_id,
@@ -2204,8 +2666,8 @@ if selected_page == "❌ Mistakes":
     if is_mentor_mode:
         st.warning("🔒 **Read-Only Mode** - Viewing student's mistakes")
     
-    # Load mistakes for current user
-    user_mistakes = load_mistakes(current_user['id'])
+    # Load mistakes for current user (newest first)
+    user_mistakes = get_sorted_mistakes(current_user['id'])
     
     col1, col2 = st.columns([2, 1])
     
@@ -2213,10 +2675,7 @@ if selected_page == "❌ Mistakes":
         st.subheader("📋 Recent Mistakes")
         
         if user_mistakes:
-            # Sort by date and time (newest first)
-            sorted_mistakes = sorted(user_mistakes, key=lambda x: (x['date'], x.get('time', '00:00:00')), reverse=True)
-            
-            for mistake in sorted_mistakes[:20]:  # Show last 20
+            for mistake in user_mistakes[:20]:  # Show last 20
                 mistake_emoji = "🔴" if mistake.get('mistake_type') in ['Revenge Trading', 'FOMO', 'Overtrading'] else "⚠️"
                 
                 with st.expander(f"{mistake_emoji} {mistake['date']} {mistake.get('time', '')} - {mistake.get('mistake_type', 'Mistake')}"):
@@ -2227,9 +2686,8 @@ if selected_page == "❌ Mistakes":
                     
                     if not is_mentor_mode:
                         if st.button(f"🗑️ Verwijder", key=f"del_mistake_{mistake['id']}"):
-                            all_mistakes = load_mistakes()
-                            all_mistakes = [m for m in all_mistakes if m['id'] != mistake['id']]
-                            save_mistakes(all_mistakes)
+                            remaining_mistakes = [m for m in load_mistakes(current_user['id']) if m['id'] != mistake['id']]
+                            save_mistakes(current_user['id'], remaining_mistakes)
                             st.success("Mistake verwijderd!")
                             st.rerun()
         else:
@@ -2239,26 +2697,20 @@ if selected_page == "❌ Mistakes":
         st.subheader("📊 Weekly Mistakes")
         
         if user_mistakes:
-            # Get mistakes from last 7 days
+            # Get mistakes from last 7 days (ISO 'YYYY-MM-DD' strings sort like dates, no parsing needed)
             today = datetime.now().date()
-            week_ago = today - timedelta(days=7)
+            week_ago = (today - timedelta(days=7)).isoformat()
             
-            weekly_mistakes = [
-                m for m in user_mistakes 
-                if datetime.strptime(m['date'], '%Y-%m-%d').date() >= week_ago
-            ]
+            weekly_mistakes = [m for m in user_mistakes if m['date'] >= week_ago]
             
             st.metric("Deze Week", len(weekly_mistakes))
             
             # Count by type
             if weekly_mistakes:
-                mistake_types = {}
-                for m in weekly_mistakes:
-                    mtype = m.get('mistake_type', 'Other')
-                    mistake_types[mtype] = mistake_types.get(mtype, 0) + 1
+                mistake_types = Counter(m.get('mistake_type', 'Other') for m in weekly_mistakes)
                 
                 st.write("**Breakdown:**")
-                for mtype, count in sorted(mistake_types.items(), key=lambda x: x[1], reverse=True):
+                for mtype, count in mistake_types.most_common():
                     st.write(f"- {mtype}: {count}x")
         else:
             st.metric("Deze Week", 0)
@@ -2268,12 +2720,8 @@ if selected_page == "❌ Mistakes":
         # Monthly stats
         st.subheader("📅 Maandelijkse Trend")
         if user_mistakes:
-            month_ago = today - timedelta(days=30)
-            monthly_mistakes = [
-                m for m in user_mistakes 
-                if datetime.strptime(m['date'], '%Y-%m-%d').date() >= month_ago
-            ]
-            st.metric("Laatste 30 Dagen", len(monthly_mistakes))
+            month_ago = (today - timedelta(days=30)).isoformat()
+            st.metric("Laatste 30 Dagen", sum(1 for m in user_mistakes if m['date'] >= month_ago))
         else:
             st.metric("Laatste 30 Dagen", 0)
     
@@ -2292,9 +2740,13 @@ if selected_page == "❌ Mistakes":
                 ])
             
             with col2:
-                # Option to link to a trade
-                trade_options = ["Geen trade"] + [f"Trade {t['id']} - {t['symbol']} ({t['date']})" for t in trades]
-                linked_trade = st.selectbox("Koppel aan trade (optioneel)", trade_options)
+                # Option to link to a trade (options are trade IDs, labels come from format_func)
+                trades_by_id = {t['id']: t for t in trades}
+                linked_trade = st.selectbox(
+                    "Koppel aan trade (optioneel)",
+                    [None] + list(trades_by_id),
+                    format_func=lambda tid: "Geen trade" if tid is None else f"Trade {tid} - {trades_by_id[tid]['symbol']} ({trades_by_id[tid]['date']})"
+                )
             
             description = st.text_area("Beschrijving", placeholder="Wat ging er mis? Wat kun je hiervan leren?")
             
@@ -2302,16 +2754,11 @@ if selected_page == "❌ Mistakes":
             
             if submit_mistake:
                 if description:
-                    trade_id = None
-                    if linked_trade != "Geen trade":
-                        # Extract trade ID from selection
-                        trade_id = int(linked_trade.split()[1])
-                    
                     add_mistake(
                         user_id=current_user['id'],
                         mistake_type=mistake_type,
                         description=description,
-                        trade_id=trade_id
+                        trade_id=linked_trade
                     )
                     st.success("✅ Mistake toegevoegd!")
                     st.rerun()
@@ -2347,9 +2794,8 @@ if selected_page == "🛡️ Avoided Trades":
                     
                     if not is_mentor_mode:
                         if st.button(f"🗑️ Verwijder", key=f"del_avoided_{avoided['id']}"):
-                            all_avoided = load_avoided_trades()
-                            all_avoided = [a for a in all_avoided if a['id'] != avoided['id']]
-                            save_avoided_trades(all_avoided)
+                            remaining_avoided = [a for a in load_avoided_trades(current_user['id']) if a['id'] != avoided['id']]
+                            save_avoided_trades(current_user['id'], remaining_avoided)
                             st.success("Avoided trade verwijderd!")
                             st.rerun()
         else:
@@ -2359,30 +2805,24 @@ if selected_page == "🛡️ Avoided Trades":
         st.subheader("📊 Statistics")
         
         if user_avoided:
-            # Weekly stats
+            # Weekly stats (ISO 'YYYY-MM-DD' strings sort like dates, no parsing needed)
             today = datetime.now().date()
-            week_ago = today - timedelta(days=7)
+            week_ago = (today - timedelta(days=7)).isoformat()
             
-            weekly_avoided = [
-                a for a in user_avoided 
-                if datetime.strptime(a['date'], '%Y-%m-%d').date() >= week_ago
-            ]
+            weekly_avoided = [a for a in user_avoided if a['date'] >= week_ago]
             
             st.metric("Deze Week", len(weekly_avoided))
             
             # Total potential loss saved
-            total_saved = sum([a.get('potential_loss', 0) for a in user_avoided])
+            total_saved = sum(a.get('potential_loss', 0) for a in user_avoided)
             st.metric("Totaal Bespaarde Loss", f"{currency}{total_saved:.2f}")
             
             # Top reasons
             if user_avoided:
-                reasons = {}
-                for a in user_avoided:
-                    reason = a.get('reason', 'Other')
-                    reasons[reason] = reasons.get(reason, 0) + 1
+                reasons = Counter(a.get('reason', 'Other') for a in user_avoided)
                 
                 st.write("**Top Redenen:**")
-                for reason, count in sorted(reasons.items(), key=lambda x: x[1], reverse=True)[:5]:
+                for reason, count in reasons.most_common(5):
                     st.write(f"- {reason}: {count}x")
         else:
             st.metric("Deze Week", 0)
@@ -2412,10 +2852,12 @@ if selected_page == "🛡️ Avoided Trades":
             submit_avoided = st.form_submit_button("✅ Voeg Avoided Trade Toe", use_container_width=True)
             
             if submit_avoided:
+                # Normalized once; a whitespace-only symbol counts as empty
+                symbol = symbol.strip().upper()
                 if symbol:
                     add_avoided_trade(
                         user_id=current_user['id'],
-                        symbol=symbol.upper(),
+                        symbol=symbol,
                         reason=reason,
                         potential_loss=potential_loss,
                         notes=notes
@@ -2434,7 +2876,7 @@ if selected_page == "📋 Pre-Trade Plan":
         st.warning("🔒 **Read-Only Mode** - Viewing student's pre-trade plans")
     
     # Load pre-trade analysis
-    user_pretrade = load_pretrade_analysis(current_user['id'])
+    user_pretrade = get_pretrade_plans(current_user['id'])
     
     col1, col2 = st.columns([2, 1])
     
@@ -2442,51 +2884,47 @@ if selected_page == "📋 Pre-Trade Plan":
         st.subheader("📝 Pre-Trade Plans")
         
         if user_pretrade:
-            sorted_pretrade = sorted(user_pretrade, key=lambda x: (x['date'], x.get('time', '00:00:00')), reverse=True)
-            
-            for plan in sorted_pretrade[:15]:
-                status_emoji = "✅" if plan.get('executed') else "⏳"
+            for plan in user_pretrade[:15]:  # already newest first
+                status_emoji = "✅" if plan['executed'] else "⏳"
                 
-                with st.expander(f"{status_emoji} {plan['date']} {plan.get('time', '')} - {plan.get('symbol', 'N/A')} {plan.get('direction', '')}"):
+                with st.expander(f"{status_emoji} {plan['date']} {plan['time']} - {plan['symbol']} {plan['direction']}"):
                     col_a, col_b = st.columns(2)
                     
+                    # One markdown element per column (blank-line separated paragraphs) instead of one per field
                     with col_a:
-                        st.write(f"**Symbol:** {plan.get('symbol', 'N/A')}")
-                        st.write(f"**Direction:** {plan.get('direction', 'N/A')}")
-                        st.write(f"**Entry Plan:** {plan.get('entry_plan', 'N/A')}")
-                        st.write(f"**Stop Loss:** {plan.get('stop_loss', 'N/A')}")
-                        st.write(f"**Take Profit:** {plan.get('take_profit', 'N/A')}")
+                        st.markdown(
+                            f"**Symbol:** {plan['symbol']}\n\n"
+                            f"**Direction:** {plan['direction']}\n\n"
+                            f"**Entry Plan:** {plan['entry_plan']}\n\n"
+                            f"**Stop Loss:** {plan['stop_loss']}\n\n"
+                            f"**Take Profit:** {plan['take_profit']}"
+                        )
                     
                     with col_b:
-                        st.write(f"**Risk/Reward:** {plan.get('risk_reward', 'N/A')}")
-                        st.write(f"**Confidence:** {plan.get('confidence', 0)}/10")
-                        st.write(f"**Status:** {'Uitgevoerd' if plan.get('executed') else 'Nog niet uitgevoerd'}")
-                        if plan.get('trade_id'):
-                            st.write(f"**Trade ID:** {plan.get('trade_id')}")
+                        plan_status = (
+                            f"**Risk/Reward:** {plan['risk_reward']}\n\n"
+                            f"**Confidence:** {plan['confidence']}/10\n\n"
+                            f"**Status:** {'Uitgevoerd' if plan['executed'] else 'Nog niet uitgevoerd'}"
+                        )
+                        if plan['trade_id']:
+                            plan_status += f"\n\n**Trade ID:** {plan['trade_id']}"
+                        st.markdown(plan_status)
                     
-                    if plan.get('checklist'):
+                    if plan['checklist']:
                         st.divider()
-                        st.write(f"**Checklist:** {plan.get('checklist')}")
+                        st.write(f"**Checklist:** {plan['checklist']}")
                     
                     if not is_mentor_mode:
                         col_x, col_y = st.columns(2)
                         with col_x:
-                            if not plan.get('executed') and st.button(f"✅ Mark Executed", key=f"exec_{plan['id']}"):
-                                all_pretrade = load_pretrade_analysis()
-                                for p in all_pretrade:
-                                    if p['id'] == plan['id']:
-                                        p['executed'] = True
-                                save_pretrade_analysis(all_pretrade)
-                                st.success("Gemarkeerd als uitgevoerd!")
-                                st.rerun()
+                            # Callbacks save before the rerun the click triggers, so no extra st.rerun() is needed
+                            if not plan['executed']:
+                                st.button(f"✅ Mark Executed", key=f"exec_{plan['id']}",
+                                          on_click=mark_pretrade_executed, args=(current_user['id'], plan['id']))
                         
                         with col_y:
-                            if st.button(f"🗑️ Verwijder", key=f"del_pretrade_{plan['id']}"):
-                                all_pretrade = load_pretrade_analysis()
-                                all_pretrade = [p for p in all_pretrade if p['id'] != plan['id']]
-                                save_pretrade_analysis(all_pretrade)
-                                st.success("Plan verwijderd!")
-                                st.rerun()
+                            st.button(f"🗑️ Verwijder", key=f"del_pretrade_{plan['id']}",
+                                      on_click=delete_pretrade_analysis, args=(current_user['id'], plan['id']))
         else:
             st.info("Nog geen pre-trade plans gemaakt.")
     
@@ -2494,15 +2932,16 @@ if selected_page == "📋 Pre-Trade Plan":
         st.subheader("📊 Statistics")
         
         if user_pretrade:
-            executed_count = len([p for p in user_pretrade if p.get('executed')])
-            pending_count = len([p for p in user_pretrade if not p.get('executed')])
+            total_plans = len(user_pretrade)
+            executed_count = sum(1 for p in user_pretrade if p['executed'])
+            pending_count = total_plans - executed_count
             
-            st.metric("Totaal Plans", len(user_pretrade))
+            st.metric("Totaal Plans", total_plans)
             st.metric("Uitgevoerd", executed_count)
             st.metric("Pending", pending_count)
             
-            if len(user_pretrade) > 0:
-                execution_rate = (executed_count / len(user_pretrade)) * 100
+            if total_plans > 0:
+                execution_rate = (executed_count / total_plans) * 100
                 st.metric("Execution Rate", f"{execution_rate:.1f}%")
         else:
             st.metric("Totaal Plans", 0)
@@ -2534,10 +2973,12 @@ if selected_page == "📋 Pre-Trade Plan":
             submit_pretrade = st.form_submit_button("✅ Save Pre-Trade Plan", use_container_width=True)
             
             if submit_pretrade:
+                # Normalized once; a whitespace-only symbol counts as empty
+                symbol = symbol.strip().upper()
                 if symbol and entry_plan:
                     add_pretrade_analysis(
                         user_id=current_user['id'],
-                        symbol=symbol.upper(),
+                        symbol=symbol,
                         direction=direction,
                         entry_plan=entry_plan,
                         stop_loss=stop_loss,
@@ -2581,36 +3022,24 @@ if selected_page == "💬 Admin Quotes":
                         col_a, col_b, col_c = st.columns(3)
                         
                         with col_a:
+                            # Callbacks save before the rerun the click triggers, so no extra st.rerun() is needed
                             if quote.get('active', True):
-                                if st.button(f"❌ Deactivate", key=f"deact_{quote['id']}"):
-                                    for q in all_quotes:
-                                        if q['id'] == quote['id']:
-                                            q['active'] = False
-                                    save_quotes(all_quotes)
-                                    st.success("Quote gedeactiveerd!")
-                                    st.rerun()
+                                st.button(f"❌ Deactivate", key=f"deact_{quote['id']}",
+                                          on_click=set_quote_active, args=(quote['id'], False))
                             else:
-                                if st.button(f"✅ Activate", key=f"act_{quote['id']}"):
-                                    for q in all_quotes:
-                                        if q['id'] == quote['id']:
-                                            q['active'] = True
-                                    save_quotes(all_quotes)
-                                    st.success("Quote geactiveerd!")
-                                    st.rerun()
+                                st.button(f"✅ Activate", key=f"act_{quote['id']}",
+                                          on_click=set_quote_active, args=(quote['id'], True))
                         
                         with col_b:
-                            if st.button(f"🗑️ Delete", key=f"del_quote_{quote['id']}"):
-                                all_quotes = [q for q in all_quotes if q['id'] != quote['id']]
-                                save_quotes(all_quotes)
-                                st.success("Quote verwijderd!")
-                                st.rerun()
+                            st.button(f"🗑️ Delete", key=f"del_quote_{quote['id']}",
+                                      on_click=delete_quote, args=(quote['id'],))
             else:
                 st.info("Nog geen quotes toegevoegd.")
         
         with col2:
             st.subheader("📊 Statistics")
             st.metric("Totaal Quotes", len(all_quotes))
-            active_quotes = len([q for q in all_quotes if q.get('active', True)])
+            active_quotes = sum(1 for q in all_quotes if q.get('active', True))
             st.metric("Active Quotes", active_quotes)
         
         st.divider()
@@ -2654,19 +3083,14 @@ if selected_page == "💬 Admin Quotes":
 # Display trades if any exist
 if trades:
     # Filter trades by selected account
-    account_trades = [t for t in trades if t.get('account_id') == selected_account['id']]
+    account_trades = trades_by_account.get(selected_account['id'], [])
     
     if not account_trades:
         st.info(f"No trades found for account: {selected_account['name']}")
         st.stop()
     
-    df = pd.DataFrame(account_trades)
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date', ascending=False)
-    
-    # Calculate cumulative profit for Equity Curve
-    df_sorted = df.sort_values('date')
-    df_sorted['cumulative_pnl'] = df_sorted['pnl'].cumsum()
+    # Parsed and sorted once per version of the trades (not on every widget interaction)
+    df = get_account_frame(current_user['id'], selected_account['id'], account_trades)
     
     # Get unique symbols for filtering
     all_symbols = sorted(df['symbol'].unique().tolist())
@@ -2684,10 +3108,6 @@ if trades:
                 
                 # Standard export
                 if len(df) > 0:
-                    # Prepare export dataframe
-                    export_df = df.copy()
-                    export_df['date'] = export_df['date'].dt.strftime('%Y-%m-%d')
-                    
                     # Select and reorder columns for export
                     export_columns = [
                         'date', 'symbol', 'side', 'entry_price', 'exit_price', 'quantity',
@@ -2696,9 +3116,9 @@ if trades:
                         'notes', 'pnl', 'r_multiple', 'account_name'
                     ]
                     
-                    # Only include columns that exist
-                    export_columns = [col for col in export_columns if col in export_df.columns]
-                    export_df_full = export_df[export_columns].copy()
+                    # Only include columns that exist; only these are copied (with the date as text)
+                    export_columns = [col for col in export_columns if col in df.columns]
+                    export_df = df[export_columns].assign(date=df['date'].dt.strftime('%Y-%m-%d'))
                     
                     # Rename columns for better readability
                     column_names = {
@@ -2723,10 +3143,10 @@ if trades:
                         'r_multiple': 'R-Multiple',
                         'account_name': 'Account'
                     }
-                    export_df_full = export_df_full.rename(columns=column_names)
+                    export_df_full = export_df.rename(columns=column_names)
                     
                     # Convert to CSV
-                    csv_all = export_df_full.to_csv(index=False)
+                    csv_all = dataframe_to_csv(export_df_full)
                     filename_all = f"all_trades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                     
                     st.download_button(
@@ -2767,16 +3187,16 @@ if trades:
                             )
                     
                     # Apply filters
-                    filtered_export_df = export_df.copy()
-                    if 'setup' in filtered_export_df.columns and unique_setups:
-                        filtered_export_df = filtered_export_df[filtered_export_df['setup'].isin(selected_setups)]
-                    if 'mood' in filtered_export_df.columns and unique_moods:
-                        filtered_export_df = filtered_export_df[filtered_export_df['mood'].isin(selected_moods)]
+                    # (a filter with every option selected keeps every row, so it is skipped)
+                    filtered_export_df = export_df
+                    if 'setup' in filtered_export_df.columns and unique_setups and len(selected_setups) < len(unique_setups):
+                        filtered_export_df = filtered_export_df[filtered_export_df['setup'].isin(set(selected_setups))]
+                    if 'mood' in filtered_export_df.columns and unique_moods and len(selected_moods) < len(unique_moods):
+                        filtered_export_df = filtered_export_df[filtered_export_df['mood'].isin(set(selected_moods))]
                     
                     if len(filtered_export_df) > 0:
-                        filtered_export_df = filtered_export_df[export_columns].copy()
                         filtered_export_df = filtered_export_df.rename(columns=column_names)
-                        csv_filtered = filtered_export_df.to_csv(index=False)
+                        csv_filtered = dataframe_to_csv(filtered_export_df)
                         
                         filter_label = []
                         if unique_setups and len(selected_setups) < len(unique_setups):
@@ -2802,35 +3222,29 @@ if trades:
                 st.subheader("📊 Export Monthelijkse Stats")
                 
                 if len(df) > 0:
-                    # Create monthly summary
-                    df_monthly = df.copy()
-                    df_monthly['year_month'] = df_monthly['date'].dt.to_period('M')
+                    # Create monthly summary (wins/losses as boolean columns, so one groupby pass covers everything)
+                    df_monthly = pd.DataFrame({
+                        'year_month': df['date'].dt.to_period('M'),
+                        'pnl': df['pnl'],
+                        'r_multiple': df['r_multiple'],
+                        'is_win': df['pnl'] > 0,
+                        'is_loss': df['pnl'] < 0,
+                    })
                     
-                    monthly_summary = df_monthly.groupby('year_month').agg({
-                        'pnl': ['sum', 'mean', 'count'],
-                        'r_multiple': 'mean'
-                    }).round(2)
+                    monthly_summary = df_monthly.groupby('year_month').agg(
+                        Total_PnL=('pnl', 'sum'),
+                        Avg_PnL_Per_Trade=('pnl', 'mean'),
+                        Total_trades=('pnl', 'count'),
+                        Avg_R_Multiple=('r_multiple', 'mean'),
+                        Winning_trades=('is_win', 'sum'),
+                        Losing_trades=('is_loss', 'sum'),
+                        Month_size=('pnl', 'size'),
+                    )
+                    rounded_columns = ['Total_PnL', 'Avg_PnL_Per_Trade', 'Avg_R_Multiple']
+                    monthly_summary[rounded_columns] = monthly_summary[rounded_columns].round(2)
                     
-                    # Calculate Win Rate per month
-                    win_rates = []
-                    winning_trades = []
-                    losing_trades = []
-                    
-                    for period in monthly_summary.index:
-                        month_trades = df_monthly[df_monthly['year_month'] == period]
-                        wins = len(month_trades[month_trades['pnl'] > 0])
-                        losses = len(month_trades[month_trades['pnl'] < 0])
-                        total = len(month_trades)
-                        win_rate = (wins / total * 100) if total > 0 else 0
-                        win_rates.append(win_rate)
-                        winning_trades.append(wins)
-                        losing_trades.append(losses)
-                    
-                    # Flatten multi-level columns
-                    monthly_summary.columns = ['Total_PnL', 'Avg_PnL_Per_Trade', 'Total_trades', 'Avg_R_Multiple']
-                    monthly_summary['Win_Rate_%'] = win_rates
-                    monthly_summary['Winning_trades'] = winning_trades
-                    monthly_summary['Losing_trades'] = losing_trades
+                    # Win Rate per month
+                    monthly_summary['Win_Rate_%'] = monthly_summary['Winning_trades'] / monthly_summary.pop('Month_size') * 100
                     
                     # Reset index to make year_month a column
                     monthly_summary = monthly_summary.reset_index()
@@ -2847,7 +3261,7 @@ if trades:
                     st.dataframe(monthly_summary, use_container_width=True, hide_index=True)
                     
                     # Convert to CSV
-                    csv_monthly = monthly_summary.to_csv(index=False)
+                    csv_monthly = dataframe_to_csv(monthly_summary)
                     filename_monthly = f"monthly_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                     
                     st.download_button(
@@ -2875,17 +3289,17 @@ if trades:
         # Apply filters
         # Handle date_range (can be single date or tuple)
         if isinstance(date_range, tuple) and len(date_range) == 2:
-            date_filter = (df['date'] >= pd.to_datetime(date_range[0])) & (df['date'] <= pd.to_datetime(date_range[1]))
+            date_filter = df['date'].between(pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]))
         elif isinstance(date_range, tuple) and len(date_range) == 1:
-            date_filter = df['date'] >= pd.to_datetime(date_range[0])
+            date_filter = df['date'] >= pd.Timestamp(date_range[0])
         else:
-            date_filter = df['date'] >= pd.to_datetime(date_range)
+            date_filter = df['date'] >= pd.Timestamp(date_range)
         
-        filtered_df = df[
-            (df['symbol'].isin(filter_symbol)) &
-            (df['side'].isin(filter_side)) &
-            date_filter
-        ].copy()
+        # all_symbols are exactly the symbols in df, so selecting all of them filters nothing
+        trade_filter = date_filter & df['side'].isin(set(filter_side))
+        if len(filter_symbol) < len(all_symbols):
+            trade_filter &= df['symbol'].isin(set(filter_symbol))
+        filtered_df = df[trade_filter]
         
         # Display metrics
         metrics = calculate_metrics(filtered_df)
@@ -2929,26 +3343,17 @@ if trades:
         
         st.divider()
         
+        # Computed once per distinct filter result; the Equity Curve and Drawdown charts share the arrays
+        chart_dates, chart_cumulative_pnl, chart_drawdown = equity_curve(filtered_df[['date', 'pnl']])
+        
         # Charts
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("📈 Equity Curve")
             if len(filtered_df) > 0:
-                fig, ax = plt.subplots(figsize=(10, 5))
-                df_chart = filtered_df.sort_values('date').copy()
-                df_chart['cumulative_pnl'] = df_chart['pnl'].cumsum()
-                ax.plot(df_chart['date'], df_chart['cumulative_pnl'], marker='o', linewidth=2, 
-                       markersize=6, color='#00ff88', markerfacecolor='#00ff88')
-                ax.axhline(y=0, color='red', linestyle='--', alpha=0.5, linewidth=1)
-                ax.fill_between(df_chart['date'], df_chart['cumulative_pnl'], 0, alpha=0.2, color='#00ff88')
-                ax.set_xlabel('Date', fontsize=12)
-                ax.set_ylabel('Cumulatieve P&L ($)', fontsize=12)
-                ax.set_title('Equity Curve', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3, linestyle='--')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
+                # Native chart: the browser draws it from the data, no server-side rendering
+                st.area_chart(pd.Series(chart_cumulative_pnl, index=chart_dates, name='Cumulatieve P&L'), color='#00ff88')
             else:
                 st.info("No data to display")
         
@@ -2960,21 +3365,14 @@ if trades:
                     if 'pnl' not in filtered_df.columns:
                         st.warning("P&L data not available")
                     else:
-                        # Convert pnl to numeric, handling any non-numeric values
-                        filtered_df['pnl'] = pd.to_numeric(filtered_df['pnl'], errors='coerce')
-                        
-                        # Remove any rows with NaN pnl values
+                        # pnl is already float (coerced once when the account frame is built); skip unparseable rows
                         valid_df = filtered_df.dropna(subset=['pnl'])
                         
                         if len(valid_df) > 0:
-                            profit_by_symbol = valid_df.groupby('symbol')['pnl'].sum().sort_values(ascending=False)
+                            profit_by_symbol = valid_df.groupby('symbol', observed=True)['pnl'].sum().sort_values(ascending=False)
                             
                             if len(profit_by_symbol) > 0:
-                                fig, ax = plt.subplots(figsize=(10, 5))
-                                if safe_plot(profit_by_symbol, 'Profit/Loss by Symbol', 'Symbol', 'Total P&L ($)', ax):
-                                    st.pyplot(fig)
-                                else:
-                                    st.info("No valid symbol data to display")
+                                show_pnl_bar_chart(profit_by_symbol, 'Profit/Loss by Symbol', 'Symbol', 'Total P&L ($)')
                             else:
                                 st.info("No valid symbol data to display")
                         else:
@@ -2994,45 +3392,16 @@ if trades:
         with col1:
             st.subheader("📉 Drawdown Chart")
             if len(filtered_df) > 0:
-                fig, ax = plt.subplots(figsize=(10, 5))
-                df_chart = filtered_df.sort_values('date').copy()
-                df_chart['cumulative_pnl'] = df_chart['pnl'].cumsum()
-                df_chart['running_max'] = df_chart['cumulative_pnl'].cummax()
-                df_chart['drawdown'] = df_chart['cumulative_pnl'] - df_chart['running_max']
-                
-                ax.fill_between(df_chart['date'], df_chart['drawdown'], 0, 
-                               color='#ff4444', alpha=0.3, label='Drawdown')
-                ax.plot(df_chart['date'], df_chart['drawdown'], 
-                       color='#ff4444', linewidth=2)
-                ax.axhline(y=0, color='white', linestyle='--', alpha=0.5, linewidth=1)
-                ax.set_xlabel('Date', fontsize=12)
-                ax.set_ylabel('Drawdown ($)', fontsize=12)
-                ax.set_title('Underwater Equity Curve', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3, linestyle='--')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
+                st.area_chart(pd.Series(chart_drawdown, index=chart_dates, name='Drawdown'), color='#ff4444')
             else:
                 st.info("No data to display")
         
         with col2:
             st.subheader("📊 Monthly Performance")
             if len(filtered_df) > 0:
-                df_monthly = filtered_df.copy()
-                df_monthly['year_month'] = df_monthly['date'].dt.to_period('M').astype(str)
-                monthly_pnl = df_monthly.groupby('year_month')['pnl'].sum().sort_index()
-                
-                fig, ax = plt.subplots(figsize=(10, 5))
-                colors = ['#00ff88' if x > 0 else '#ff4444' for x in monthly_pnl.values]
-                monthly_pnl.plot(kind='bar', ax=ax, color=colors, edgecolor='white', linewidth=1.5)
-                ax.axhline(y=0, color='white', linewidth=1)
-                ax.set_xlabel('Month', fontsize=12)
-                ax.set_ylabel('P&L ($)', fontsize=12)
-                ax.set_title('Monthly Performance', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3, axis='y', linestyle='--')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
+                monthly_pnl = monthly_pnl_totals(filtered_df[['date', 'pnl']])
+                
+                show_pnl_bar_chart(monthly_pnl, 'Monthly Performance', 'Month', 'P&L ($)')
             else:
                 st.info("No data to display")
         
@@ -3044,31 +3413,10 @@ if trades:
         with col1:
             st.subheader("📅 Best Day of Week")
             if len(filtered_df) > 0:
-                df_dow = filtered_df.copy()
-                df_dow['day_of_week'] = df_dow['date'].dt.day_name()
-                
-                # Order days correctly
-                day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                dow_stats = df_dow.groupby('day_of_week').agg({
-                    'pnl': ['sum', 'mean', 'count']
-                }).round(2)
-                dow_stats.columns = ['Total P&L', 'Avg P&L', 'Trades']
-                
-                # Reindex to correct order
-                dow_stats = dow_stats.reindex([d for d in day_order if d in dow_stats.index])
-                
-                fig, ax = plt.subplots(figsize=(10, 5))
-                colors = ['#00ff88' if x > 0 else '#ff4444' for x in dow_stats['Total P&L']]
-                dow_stats['Total P&L'].plot(kind='bar', ax=ax, color=colors, 
-                                           edgecolor='white', linewidth=1.5)
-                ax.axhline(y=0, color='white', linewidth=1)
-                ax.set_xlabel('Day of Week', fontsize=12)
-                ax.set_ylabel('Total P&L ($)', fontsize=12)
-                ax.set_title('Performance by Day of Week', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3, axis='y', linestyle='--')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
+                # Days in calendar order
+                dow_stats = day_of_week_stats(filtered_df[['date', 'pnl']])
+                
+                show_pnl_bar_chart(dow_stats['Total P&L'], 'Performance by Day of Week', 'Day of Week', 'Total P&L ($)')
                 
                 # Show best day
                 best_day = dow_stats['Total P&L'].idxmax()
@@ -3102,36 +3450,8 @@ if trades:
         if len(filtered_df) == 0:
             st.info("No trades gevonden met de huidige filters")
         
-        # Display trades with delete button
-        for idx, row in filtered_df.iterrows():
-            col1, col2, col3, col4, col5, col6, col7, col8, col9, col10 = st.columns([1.5, 1.5, 1, 1.5, 1.5, 1, 2, 1.5, 2.5, 1])
-            
-            with col1:
-                st.text(row['date'].strftime('%Y-%m-%d'))
-            with col2:
-                st.text(f"**{row['symbol']}**")
-            with col3:
-                st.text(row['side'])
-            with col4:
-                st.text(f"${row['entry_price']:.2f}")
-            with col5:
-                st.text(f"${row['exit_price']:.2f}")
-            with col6:
-                st.text(str(row['quantity']))
-            with col7:
-                pnl_color = "🟢" if row['pnl'] > 0 else "🔴"
-                st.markdown(f"{pnl_color} **${row['pnl']:.2f}**")
-            with col8:
-                st.text(f"{row['r_multiple']:.2f}R")
-            with col9:
-                st.text(row['setup'][:20] + "..." if len(row['setup']) > 20 else row['setup'])
-            with col10:
-                if st.button("🗑️", key=f"del_{row['id']}", help="Delete this trade"):
-                    if delete_trade(row['id']):
-                        # Force fresh data load
-                        st.session_state['force_reload'] = True
-                        st.success(f"Trade {row['id']} Deleted!")
-                        st.rerun()
+        # Display trades (one table) with a delete selector
+        show_trade_table(filtered_df, key="all_trades")
     
     # PAGE: Calendar View
     if selected_page == "📅 Calendar":
@@ -3161,59 +3481,26 @@ if trades:
             )
         
         with col2:
-            # Filter dataframe by selected symbols
-            calendar_df = df[df['symbol'].isin(calendar_symbols)] if calendar_symbols else df
+            # Filter dataframe by selected symbols (selecting all of all_symbols filters nothing, so skip the mask)
+            if calendar_symbols and len(calendar_symbols) < len(all_symbols):
+                calendar_df = df[df['symbol'].isin(set(calendar_symbols))]
+            else:
+                calendar_df = df
             
             # Create calendar
-            daily_stats = create_calendar_view(calendar_df, selected_year, selected_month)
+            daily_stats = create_calendar_view(calendar_df[['date', 'pnl', 'symbol']], selected_year, selected_month)
             
             if daily_stats is not None and len(daily_stats) > 0:
                 # Get calendar matrix
                 month_cal = cal.monthcalendar(selected_year, selected_month)
                 
+                # Day of month -> (pnl, trades), so each calendar cell is a dict lookup
+                day_totals = {day: (pnl, num) for day, pnl, num in daily_stats.itertuples(index=False)}
+                
                 st.subheader(f"{cal.month_name[selected_month]} {selected_year}")
                 
-                # Create calendar grid
-                days = ['Ma', 'Di', 'Wo', 'Do', 'Vr', 'Za', 'Zo']
-                cols = st.columns(7)
-                for i, day in enumerate(days):
-                    cols[i].markdown(f"**{day}**")
-                
-                for week in month_cal:
-                    cols = st.columns(7)
-                    for i, day in enumerate(week):
-                        if day == 0:
-                            cols[i].text("")
-                        else:
-                            day_date = datetime(selected_year, selected_month, day).date()
-                            day_data = daily_stats[daily_stats['date'] == day_date]
-                            
-                            if len(day_data) > 0:
-                                pnl = day_data.iloc[0]['pnl']
-                                num_trades = int(day_data.iloc[0]['num_trades'])
-                                
-                                if pnl > 0:
-                                    cols[i].markdown(f"""
-                                    <div style='background-color: #00ff0030; padding: 10px; border-radius: 5px; border: 2px solid #00ff00;'>
-                                        <div style='font-weight: bold; font-size: 20px;'>{day}</div>
-                                        <div style='color: #00ff00; font-size: 16px; font-weight: bold;'>{currency}{pnl:.0f}</div>
-                                        <div style='font-size: 11px;'>{num_trades} trades</div>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                                else:
-                                    cols[i].markdown(f"""
-                                    <div style='background-color: #ff000030; padding: 10px; border-radius: 5px; border: 2px solid #ff4444;'>
-                                        <div style='font-weight: bold; font-size: 20px;'>{day}</div>
-                                        <div style='color: #ff4444; font-size: 16px; font-weight: bold;'>{currency}{pnl:.0f}</div>
-                                        <div style='font-size: 11px;'>{num_trades} trades</div>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                            else:
-                                cols[i].markdown(f"""
-                                <div style='background-color: #1e1e1e; padding: 10px; border-radius: 5px;'>
-                                    <div style='font-size: 18px; color: #666;'>{day}</div>
-                                </div>
-                                """, unsafe_allow_html=True)
+                # Whole month as one HTML grid (one st.markdown instead of one per cell)
+                st.markdown(month_calendar_html(month_cal, day_totals, currency), unsafe_allow_html=True)
                 
                 st.divider()
                 
@@ -3221,10 +3508,12 @@ if trades:
                 st.subheader("📊 Daily Summary")
                 if calendar_symbols:
                     st.caption(f"Filtered by: {', '.join(calendar_symbols)}")
-                daily_summary = daily_stats.copy()
-                daily_summary['date'] = pd.to_datetime(daily_summary['date']).dt.strftime('%Y-%m-%d (%A)')
-                daily_summary['pnl'] = daily_summary['pnl'].apply(lambda x: f"{currency}{x:.2f}")
-                daily_summary.columns = ['Date', 'P&L', 'Number of trades']
+                # Small display frame built from the columns directly (no copy of daily_stats)
+                daily_summary = pd.DataFrame({
+                    'Date': [datetime(selected_year, selected_month, day).strftime('%Y-%m-%d (%A)') for day in daily_stats['day']],
+                    'P&L': [f"{currency}{x:.2f}" for x in daily_stats['pnl']],
+                    'Number of trades': daily_stats['num_trades']
+                })
                 st.dataframe(daily_summary, use_container_width=True, hide_index=True)
             else:
                 st.info("No trades in this month" + (f" for {', '.join(calendar_symbols)}" if calendar_symbols else ""))
@@ -3238,20 +3527,15 @@ if trades:
             # Symbol selector
             selected_symbol = st.selectbox("Select Symbol", all_symbols)
         with col2:
-            st.write("")
-            st.write("")
+            st.markdown(SPACER_HTML, unsafe_allow_html=True)
             if st.button("🗑️ Delete all trades for this symbol", type="secondary"):
                 if 'confirm_delete_symbol' not in st.session_state:
                     st.session_state['confirm_delete_symbol'] = selected_symbol
                     st.warning(f"⚠️ Click again to delete ALL {selected_symbol} trades")
                 elif st.session_state['confirm_delete_symbol'] == selected_symbol:
-                    # Delete all trades for this symbol
-                    all_trades = load_trades()
-                    all_trades = [t for t in all_trades if t.get('symbol') != selected_symbol]
-                    # Reassign IDs
-                    for i, trade in enumerate(all_trades):
-                        trade['id'] = i
-                    save_trades(all_trades)
+                    # Delete this user's trades for the symbol in the selected account (df) in one batch,
+                    # database rows included; remaining trades keep their IDs
+                    delete_trades([int(trade_id) for trade_id in df.loc[df['symbol'] == selected_symbol, 'id']])
                     del st.session_state['confirm_delete_symbol']
                     st.session_state['force_reload'] = True
                     st.success(f"✅ All {selected_symbol} trades deleted!")
@@ -3260,7 +3544,7 @@ if trades:
                     st.session_state['confirm_delete_symbol'] = selected_symbol
                     st.warning(f"⚠️ Click again to delete ALL {selected_symbol} trades")
         
-        symbol_df = df[df['symbol'] == selected_symbol].copy()
+        symbol_df = df[df['symbol'] == selected_symbol]
         
         if len(symbol_df) > 0:
             metrics = calculate_metrics(symbol_df)
@@ -3283,66 +3567,24 @@ if trades:
             
             with col1:
                 st.subheader(f"📈 Equity Curve - {selected_symbol}")
-                fig, ax = plt.subplots(figsize=(10, 5))
-                symbol_sorted = symbol_df.sort_values('date')
-                symbol_sorted['cumulative_pnl'] = symbol_sorted['pnl'].cumsum()
-                ax.plot(symbol_sorted['date'], symbol_sorted['cumulative_pnl'], 
-                       marker='o', linewidth=2, markersize=6, color='#00ff88')
-                ax.axhline(y=0, color='red', linestyle='--', alpha=0.5)
-                ax.fill_between(symbol_sorted['date'], symbol_sorted['cumulative_pnl'], 0, 
-                               alpha=0.2, color='#00ff88')
-                ax.set_xlabel('Date')
-                ax.set_ylabel('Cumulatieve P&L ($)')
-                ax.set_title(f'Equity Curve - {selected_symbol}')
-                ax.grid(True, alpha=0.3)
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
+                symbol_dates, symbol_cumulative_pnl, _ = equity_curve(symbol_df[['date', 'pnl']])
+                st.area_chart(pd.Series(symbol_cumulative_pnl, index=symbol_dates, name='Cumulatieve P&L'), color='#00ff88')
             
             with col2:
                 st.subheader(f"📊 Win/Loss Distribution - {selected_symbol}")
-                fig, ax = plt.subplots(figsize=(10, 5))
+                fig, ax = plt.subplots(figsize=(10, 5), layout='constrained')
                 win_loss = [metrics['winning_trades'], metrics['losing_trades']]
                 colors_pie = ['#00ff88', '#ff4444']
                 ax.pie(win_loss, labels=['Wins', 'Losses'], colors=colors_pie, 
                       autopct='%1.1f%%', startangle=90)
                 ax.set_title(f'Win/Loss Ratio - {selected_symbol}')
-                st.pyplot(fig)
+                show_figure(fig)
             
             st.divider()
             
             # Trade history for this symbol
             st.subheader(f"📋 Trade History - {selected_symbol}")
-            symbol_display = symbol_df.copy()
-            symbol_display = symbol_display.sort_values('date', ascending=False)
-            
-            for idx, row in symbol_display.iterrows():
-                col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.columns([1.5, 1, 1.5, 1.5, 1, 2, 1.5, 2.5, 1])
-                
-                with col1:
-                    st.text(row['date'].strftime('%Y-%m-%d'))
-                with col2:
-                    st.text(row['side'])
-                with col3:
-                    st.text(f"${row['entry_price']:.2f}")
-                with col4:
-                    st.text(f"${row['exit_price']:.2f}")
-                with col5:
-                    st.text(str(row['quantity']))
-                with col6:
-                    pnl_color = "🟢" if row['pnl'] > 0 else "🔴"
-                    st.markdown(f"{pnl_color} **${row['pnl']:.2f}**")
-                with col7:
-                    st.text(f"{row['r_multiple']:.2f}R")
-                with col8:
-                    st.text(row['setup'])
-                with col9:
-                    if st.button("🗑️", key=f"del_sym_{row['id']}", help="Delete"):
-                        if delete_trade(row['id']):
-                            # Force fresh data load
-                            st.session_state['force_reload'] = True
-                            st.success(f"Trade {row['id']} Deleted!")
-                            st.rerun()
+            show_trade_table(symbol_df.sort_values('date', ascending=False), key="symbol_trades", show_symbol=False)
         else:
             st.info(f"No trades found for {selected_symbol}")
 
@@ -3365,6 +3607,9 @@ if trades:
         
         # Check if psychological data exists
         if 'mood' in df.columns:
+            psychology_columns = [col for col in ['mood', 'influence', 'trade_type', 'market_condition'] if col in df.columns]
+            psychology_stats = pnl_stats_by(df[psychology_columns + ['pnl']], tuple(psychology_columns))
+            
             col1, col2 = st.columns(2)
             
             with col1:
@@ -3372,11 +3617,7 @@ if trades:
                 
                 # Check if mood data exists and has numeric values
                 if 'mood' in df.columns and not df['mood'].isna().all():
-                    mood_stats = df.groupby('mood').agg({
-                        'pnl': ['sum', 'mean', 'count']
-                    }).round(2)
-                    mood_stats.columns = ['Total P&L', 'Avg P&L', 'Number of trades']
-                    mood_stats = mood_stats.sort_values('Total P&L', ascending=False)
+                    mood_stats = psychology_stats['mood']
                     
                     # Check if we have numeric data to plot
                     if not mood_stats.empty and mood_stats['Total P&L'].notna().any():
@@ -3385,17 +3626,7 @@ if trades:
                         
                         if not mood_stats_clean.empty and mood_stats_clean['Total P&L'].dtype in ['float64', 'int64']:
                             # Create bar chart for mood
-                            fig, ax = plt.subplots(figsize=(10, 5))
-                            colors = ['#00ff88' if x > 0 else '#ff4444' for x in mood_stats_clean['Total P&L']]
-                            mood_stats_clean['Total P&L'].plot(kind='bar', ax=ax, color=colors, edgecolor='white', linewidth=1.5)
-                            ax.axhline(y=0, color='white', linewidth=1)
-                            ax.set_xlabel('Mood', fontsize=12)
-                            ax.set_ylabel('Total P&L ($)', fontsize=12)
-                            ax.set_title('Profitability per Mood', fontsize=14, fontweight='bold')
-                            ax.grid(True, alpha=0.3, axis='y')
-                            plt.xticks(rotation=45)
-                            plt.tight_layout()
-                            st.pyplot(fig)
+                            show_pnl_bar_chart(mood_stats_clean['Total P&L'], 'Profitability per Mood', 'Mood', 'Total P&L ($)')
                             
                             # Display mood statistics table
                             st.dataframe(mood_stats_clean, use_container_width=True)
@@ -3414,36 +3645,21 @@ if trades:
                 
                 # Check if influence column exists and has data
                 if 'influence' in df.columns and df['influence'].notna().any():
-                    influence_stats = df[df['influence'] != ''].groupby('influence').agg({
-                        'pnl': ['sum', 'mean', 'count']
-                    }).round(2)
+                    # Trades without an influence only make up the '' group
+                    influence_stats = psychology_stats['influence'].drop('', errors='ignore')
                     
-                    if len(influence_stats) > 0 and influence_stats['pnl']['sum'].notna().any():
-                        influence_stats.columns = ['Total P&L', 'Avg P&L', 'Number of trades']
-                        influence_stats = influence_stats.sort_values('Total P&L', ascending=False)
-                        
+                    if len(influence_stats) > 0 and influence_stats['Total P&L'].notna().any():
                         # Create bar chart for influence
-                        fig, ax = plt.subplots(figsize=(10, 5))
-                        colors = ['#00ff88' if x > 0 else '#ff4444' for x in influence_stats['Total P&L']]
-                        influence_stats['Total P&L'].plot(kind='bar', ax=ax, color=colors, 
-                                                          edgecolor='white', linewidth=1.5)
-                        ax.axhline(y=0, color='white', linewidth=1)
-                        ax.set_xlabel('Influence/Reason', fontsize=12)
-                        ax.set_ylabel('Total P&L ($)', fontsize=12)
-                        ax.set_title('Profitability per Influence', fontsize=14, fontweight='bold')
-                        ax.grid(True, alpha=0.3, axis='y')
-                        plt.xticks(rotation=45)
-                        plt.tight_layout()
-                        st.pyplot(fig)
+                        show_pnl_bar_chart(influence_stats['Total P&L'], 'Profitability per Influence', 'Influence/Reason', 'Total P&L ($)')
                         
                         st.dataframe(influence_stats, use_container_width=True)
                         
                         # Show best influence with date
                         best_influence = influence_stats.index[0]
-                        best_influence_trades = df[df['influence'] == best_influence].sort_values('pnl', ascending=False)
-                        if len(best_influence_trades) > 0:
-                            best_inf_date = best_influence_trades.iloc[0]['date'].strftime('%Y-%m-%d')
-                            best_inf_pnl = best_influence_trades.iloc[0]['pnl']
+                        best_influence_trade = best_trade(df[df['influence'] == best_influence])
+                        if best_influence_trade is not None:
+                            best_inf_date = best_influence_trade['date'].strftime('%Y-%m-%d')
+                            best_inf_pnl = best_influence_trade['pnl']
                             st.info(f"💡 Best '{best_influence}' trade: 📅 {best_inf_date} ({currency}{best_inf_pnl:.2f})")
                     else:
                         st.warning("⚠️ No influence data available for analysis")
@@ -3458,46 +3674,18 @@ if trades:
             
             with col1:
                 st.subheader("🎯 Performance by Trade Type")
-                type_stats = df.groupby('trade_type').agg({
-                    'pnl': ['sum', 'mean', 'count']
-                }).round(2)
-                type_stats.columns = ['Total P&L', 'Avg P&L', 'Number of trades']
-                type_stats = type_stats.sort_values('Total P&L', ascending=False)
+                type_stats = psychology_stats['trade_type']
                 
                 # Create bar chart for trade type
-                fig, ax = plt.subplots(figsize=(10, 5))
-                colors = ['#00ff88' if x > 0 else '#ff4444' for x in type_stats['Total P&L']]
-                type_stats['Total P&L'].plot(kind='bar', ax=ax, color=colors, edgecolor='white', linewidth=1.5)
-                ax.axhline(y=0, color='white', linewidth=1)
-                ax.set_xlabel('Trade Type', fontsize=12)
-                ax.set_ylabel('Total P&L ($)', fontsize=12)
-                ax.set_title('Profitability per Trade Type', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3, axis='y')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
+                show_pnl_bar_chart(type_stats['Total P&L'], 'Profitability per Trade Type', 'Trade Type', 'Total P&L ($)')
                 
                 st.dataframe(type_stats, use_container_width=True)
             
             with col2:
                 st.subheader("🌍 Performance by Market Condition")
-                market_stats = df.groupby('market_condition').agg({
-                    'pnl': ['sum', 'mean', 'count']
-                }).round(2)
-                market_stats.columns = ['Total P&L', 'Avg P&L', 'Number of trades']
-                market_stats = market_stats.sort_values('Total P&L', ascending=False)
-                
-                fig, ax = plt.subplots(figsize=(10, 5))
-                colors = ['#00ff88' if x > 0 else '#ff4444' for x in market_stats['Total P&L']]
-                market_stats['Total P&L'].plot(kind='bar', ax=ax, color=colors, edgecolor='white', linewidth=1.5)
-                ax.axhline(y=0, color='white', linewidth=1)
-                ax.set_xlabel('Market Condition', fontsize=12)
-                ax.set_ylabel('Total P&L ($)', fontsize=12)
-                ax.set_title('Profitability per Market Condition', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3, axis='y')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
+                market_stats = psychology_stats['market_condition']
+                
+                show_pnl_bar_chart(market_stats['Total P&L'], 'Profitability per Market Condition', 'Market Condition', 'Total P&L ($)')
                 
                 st.dataframe(market_stats, use_container_width=True)
             
@@ -3510,14 +3698,11 @@ if trades:
                 
                 # Calculate correlations
                 mental_factors = ['focus_level', 'stress_level', 'sleep_quality', 'pre_trade_confidence', 'duration_minutes']
-                correlations = {}
-                
-                for factor in mental_factors:
-                    if factor in df.columns:
-                        corr = df[factor].corr(df['pnl'])
-                        correlations[factor] = corr
+                factor_columns = [factor for factor in mental_factors if factor in df.columns]
+                # One pairwise-complete Pearson pass over all factors + pnl, keep the pnl column
+                correlations = df[factor_columns + ['pnl']].corr()['pnl'].drop('pnl')
                 
-                corr_df = pd.DataFrame(list(correlations.items()), columns=['Factor', 'Correlatie met P&L'])
+                corr_df = pd.DataFrame({'Factor': correlations.index, 'Correlatie met P&L': correlations.to_numpy()})
                 corr_df['Correlatie met P&L'] = corr_df['Correlatie met P&L'].round(3)
                 corr_df = corr_df.sort_values('Correlatie met P&L', ascending=False)
                 
@@ -3532,15 +3717,14 @@ if trades:
                 corr_df['Factor'] = corr_df['Factor'].map(factor_names)
                 
                 # Create bar chart
-                fig, ax = plt.subplots(figsize=(10, 5))
-                colors = ['#00ff88' if x > 0 else '#ff4444' for x in corr_df['Correlatie met P&L']]
+                fig, ax = plt.subplots(figsize=(10, 5), layout='constrained')
+                colors = np.where(corr_df['Correlatie met P&L'].to_numpy() > 0, '#00ff88', '#ff4444')
                 ax.barh(corr_df['Factor'], corr_df['Correlatie met P&L'], color=colors, edgecolor='white', linewidth=1.5)
                 ax.axvline(x=0, color='white', linewidth=1)
                 ax.set_xlabel('Correlatie Coefficient', fontsize=12)
                 ax.set_title('Mental State Correlatie met P&L', fontsize=14, fontweight='bold')
                 ax.grid(True, alpha=0.3, axis='x')
-                plt.tight_layout()
-                st.pyplot(fig)
+                show_figure(fig)
                 
                 st.info("📈 Positive correlation = Higher value → Better results\n\n📉 Negative correlation = Higher value → Worse results")
                 st.dataframe(corr_df, use_container_width=True, hide_index=True)
@@ -3553,14 +3737,15 @@ if trades:
                     st.caption("Which combination works best?")
                     
                     # Mood vs PnL
-                    mood_influence = df.groupby(['mood', 'influence']).agg({
+                    mood_influence = df.groupby(['mood', 'influence'], observed=True).agg({
                         'pnl': ['sum', 'count']
                     }).round(2)
                     
                     if len(mood_influence) > 0:
                         mood_influence.columns = ['Total P&L', 'trades']
                         mood_influence = mood_influence[mood_influence['trades'] >= 1]  # At least 1 trade
-                        mood_influence = mood_influence.sort_values('Total P&L', ascending=False).head(10)
+                        # Top 10 by partial selection instead of sorting every combination
+                        mood_influence = mood_influence.nlargest(10, 'Total P&L')
                         
                         # Reset index to show mood and influence as columns
                         mood_influence = mood_influence.reset_index()
@@ -3571,14 +3756,14 @@ if trades:
                         if len(mood_influence) > 0:
                             best_combo = mood_influence.iloc[0]
                             # Find best trade with this combo
-                            combo_trades = df[
+                            best_combo_trade = best_trade(df[
                                 (df['mood'] == best_combo['mood']) & 
                                 (df['influence'] == best_combo['influence'])
-                            ].sort_values('pnl', ascending=False)
+                            ])
                             
-                            if len(combo_trades) > 0:
-                                best_combo_date = combo_trades.iloc[0]['date'].strftime('%Y-%m-%d')
-                                best_combo_pnl = combo_trades.iloc[0]['pnl']
+                            if best_combo_trade is not None:
+                                best_combo_date = best_combo_trade['date'].strftime('%Y-%m-%d')
+                                best_combo_pnl = best_combo_trade['pnl']
                                 st.success(f"🏆 **Best Combo:**\n\n{best_combo['mood']} + {best_combo['influence']}\n\n💰 {currency}{best_combo['Total P&L']:.2f} ({int(best_combo['trades'])} trades)\n\n📅 Best trade: {best_combo_date}\n💵 {currency}{best_combo_pnl:.2f}")
                     else:
                         st.info("Add trades to see correlations")
@@ -3597,7 +3782,7 @@ if trades:
                 if len(high_conf) > 0:
                     avg_pnl = high_conf['pnl'].mean()
                     win_rate = (len(high_conf[high_conf['pnl'] > 0]) / len(high_conf) * 100)
-                    best_high_conf = high_conf.sort_values('pnl', ascending=False).iloc[0]
+                    best_high_conf = best_trade(high_conf)
                     st.metric("High Confidence (4-5)", f"{currency}{avg_pnl:.2f}", f"{win_rate:.1f}% WR")
                     st.caption(f"📅 Best: {best_high_conf['date'].strftime('%Y-%m-%d')} ({currency}{best_high_conf['pnl']:.2f})")
                 else:
@@ -3608,7 +3793,7 @@ if trades:
                 if len(med_conf) > 0:
                     avg_pnl = med_conf['pnl'].mean()
                     win_rate = (len(med_conf[med_conf['pnl'] > 0]) / len(med_conf) * 100)
-                    best_med_conf = med_conf.sort_values('pnl', ascending=False).iloc[0]
+                    best_med_conf = best_trade(med_conf)
                     st.metric("Normal Confidence (2-3)", f"{currency}{avg_pnl:.2f}", f"{win_rate:.1f}% WR")
                     st.caption(f"📅 Best: {best_med_conf['date'].strftime('%Y-%m-%d')} ({currency}{best_med_conf['pnl']:.2f})")
                 else:
@@ -3619,7 +3804,7 @@ if trades:
                 if len(low_conf) > 0:
                     avg_pnl = low_conf['pnl'].mean()
                     win_rate = (len(low_conf[low_conf['pnl'] > 0]) / len(low_conf) * 100)
-                    best_low_conf = low_conf.sort_values('pnl', ascending=False).iloc[0]
+                    best_low_conf = best_trade(low_conf)
                     st.metric("Low Confidence (1)", f"{currency}{avg_pnl:.2f}", f"{win_rate:.1f}% WR")
                     st.caption(f"📅 Best: {best_low_conf['date'].strftime('%Y-%m-%d')} ({currency}{best_low_conf['pnl']:.2f})")
                 else:
@@ -3643,7 +3828,7 @@ if trades:
                     
                     # Best winning trade by duration
                     if len(winners) > 0:
-                        best_winner = winners.sort_values('pnl', ascending=False).iloc[0]
+                        best_winner = best_trade(winners)
                         best_win_date = best_winner['date'].strftime('%Y-%m-%d')
                         best_win_duration = best_winner['duration_minutes']
                         best_win_pnl = best_winner['pnl']
@@ -3657,7 +3842,7 @@ if trades:
                         st.metric("Avg Duration Losses", f"{avg_loss_duration:.0f} min")
                     
                     # Chart: Duration distribution
-                    fig, ax = plt.subplots(figsize=(10, 5))
+                    fig, ax = plt.subplots(figsize=(10, 5), layout='constrained')
                     
                     if len(winners) > 0:
                         ax.hist(winners['duration_minutes'], bins=20, alpha=0.5, color='#00ff88', 
@@ -3671,8 +3856,7 @@ if trades:
                     ax.set_title('Trade Duration Distributie', fontsize=14, fontweight='bold')
                     ax.legend()
                     ax.grid(True, alpha=0.3, axis='y')
-                    plt.tight_layout()
-                    st.pyplot(fig)
+                    show_figure(fig)
                 
                 with col2:
                     # Performance by duration buckets
@@ -3698,18 +3882,7 @@ if trades:
                         st.dataframe(duration_stats, use_container_width=True)
                         
                         # Bar chart
-                        fig, ax = plt.subplots(figsize=(10, 5))
-                        colors = ['#00ff88' if x > 0 else '#ff4444' for x in duration_stats['Total P&L']]
-                        duration_stats['Total P&L'].plot(kind='bar', ax=ax, color=colors, 
-                                                         edgecolor='white', linewidth=1.5)
-                        ax.axhline(y=0, color='white', linewidth=1)
-                        ax.set_xlabel('Duration', fontsize=12)
-                        ax.set_ylabel('Total P&L ($)', fontsize=12)
-                        ax.set_title('Performance per Trade Duration', fontsize=14, fontweight='bold')
-                        ax.grid(True, alpha=0.3, axis='y')
-                        plt.xticks(rotation=45)
-                        plt.tight_layout()
-                        st.pyplot(fig)
+                        show_pnl_bar_chart(duration_stats['Total P&L'], 'Performance per Trade Duration', 'Duration', 'Total P&L ($)')
                     else:
                         st.info("Add duration to your trades for this analysis")
             
@@ -3721,23 +3894,23 @@ if trades:
             # Find best mood with dates
             best_mood = mood_stats['Total P&L'].idxmax()
             best_mood_pnl = mood_stats.loc[best_mood, 'Total P&L']
-            best_mood_trades = df[df['mood'] == best_mood].sort_values('pnl', ascending=False)
-            best_mood_date = best_mood_trades.iloc[0]['date'].strftime('%Y-%m-%d') if len(best_mood_trades) > 0 else 'N/A'
-            best_mood_best_pnl = best_mood_trades.iloc[0]['pnl'] if len(best_mood_trades) > 0 else 0
+            best_mood_trade = best_trade(df[df['mood'] == best_mood])
+            best_mood_date = best_mood_trade['date'].strftime('%Y-%m-%d') if best_mood_trade is not None else 'N/A'
+            best_mood_best_pnl = best_mood_trade['pnl'] if best_mood_trade is not None else 0
             
             # Find best trade type with dates
             best_type = type_stats['Total P&L'].idxmax()
             best_type_pnl = type_stats.loc[best_type, 'Total P&L']
-            best_type_trades = df[df['trade_type'] == best_type].sort_values('pnl', ascending=False)
-            best_type_date = best_type_trades.iloc[0]['date'].strftime('%Y-%m-%d') if len(best_type_trades) > 0 else 'N/A'
-            best_type_best_pnl = best_type_trades.iloc[0]['pnl'] if len(best_type_trades) > 0 else 0
+            best_type_trade = best_trade(df[df['trade_type'] == best_type])
+            best_type_date = best_type_trade['date'].strftime('%Y-%m-%d') if best_type_trade is not None else 'N/A'
+            best_type_best_pnl = best_type_trade['pnl'] if best_type_trade is not None else 0
             
             # Find best market condition with dates
             best_market = market_stats['Total P&L'].idxmax()
             best_market_pnl = market_stats.loc[best_market, 'Total P&L']
-            best_market_trades = df[df['market_condition'] == best_market].sort_values('pnl', ascending=False)
-            best_market_date = best_market_trades.iloc[0]['date'].strftime('%Y-%m-%d') if len(best_market_trades) > 0 else 'N/A'
-            best_market_best_pnl = best_market_trades.iloc[0]['pnl'] if len(best_market_trades) > 0 else 0
+            best_market_trade = best_trade(df[df['market_condition'] == best_market])
+            best_market_date = best_market_trade['date'].strftime('%Y-%m-%d') if best_market_trade is not None else 'N/A'
+            best_market_best_pnl = best_market_trade['pnl'] if best_market_trade is not None else 0
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -4365,7 +4538,7 @@ if trades:
                             
                             # Create trade object
                             quick_trade = {
-                                'id': max([t.get('id', 0) for t in trades], default=0) + 1,
+                                'id': max((t.get('id', 0) for t in trades), default=0) + 1,
                                 'user_id': current_user['id'],
                                 'account_id': selected_account.get('id', 1),
                                 'account_name': selected_account.get('name', 'Main Account'),
@@ -4418,7 +4591,7 @@ if trades:
                             st.metric("Quick P&L", f"€{quick_pnl:.2f}")
                         
                         with col3:
-                            quick_wins = len([t for t in recent_trades if t.get('pnl', 0) > 0])
+                            quick_wins = sum(1 for t in recent_trades if t.get('pnl', 0) > 0)
                             quick_wr = (quick_wins / len(recent_trades) * 100) if recent_trades else 0
                             st.metric("Quick Win Rate", f"{quick_wr:.1f}%")
                         
@@ -4529,7 +4702,7 @@ if trades:
                         
                         if today_trades:
                             today_pnl = sum(t.get('pnl', 0) for t in today_trades)
-                            today_wins = len([t for t in today_trades if t.get('pnl', 0) > 0])
+                            today_wins = sum(1 for t in today_trades if t.get('pnl', 0) > 0)
                             today_wr = (today_wins / len(today_trades) * 100) if today_trades else 0
                             
                             st.metric("Today's P&L", f"€{today_pnl:.2f}")
@@ -4546,7 +4719,7 @@ if trades:
                         
                         if week_trades:
                             week_pnl = sum(t.get('pnl', 0) for t in week_trades)
-                            week_wins = len([t for t in week_trades if t.get('pnl', 0) > 0])
+                            week_wins = sum(1 for t in week_trades if t.get('pnl', 0) > 0)
                             week_wr = (week_wins / len(week_trades) * 100) if week_trades else 0
                             
                             st.metric("Week's P&L", f"€{week_pnl:.2f}")
@@ -4580,7 +4753,7 @@ if trades:
                             symbol_pnl[symbol] += trade.get('pnl', 0)
                         
                         if symbol_pnl:
-                            top_symbols = sorted(symbol_pnl.items(), key=lambda x: x[1], reverse=True)[:5]
+                            top_symbols = sorted(symbol_pnl.items(), key=itemgetter(1), reverse=True)[:5]
                             
                             st.markdown("### 🏆 Top Symbols")
                             for symbol, pnl in top_symbols:
@@ -5340,8 +5513,7 @@ if trades:
                 )
             
             with col3:
-                st.write("")
-                st.write("")
+                st.markdown(SPACER_HTML, unsafe_allow_html=True)
                 auto_play = st.checkbox("Auto-play", key="auto_play")
             
             # Filter trades for replay
@@ -5389,22 +5561,20 @@ if trades:
                     
                     with col1:
                         st.subheader("📈 Equity Curve Evolution")
-                        fig, ax = plt.subplots(figsize=(10, 5))
-                        replay_chart = replay_subset.copy()
-                        replay_chart['cumulative_pnl'] = replay_chart['pnl'].cumsum()
+                        fig, ax = plt.subplots(figsize=(10, 5), layout='constrained')
+                        replay_cumulative_pnl = replay_subset['pnl'].cumsum()
                         
-                        ax.plot(replay_chart['date'], replay_chart['cumulative_pnl'], 
+                        ax.plot(replay_subset['date'], replay_cumulative_pnl, 
                                marker='o', linewidth=2, markersize=4, color='#00ff88')
                         ax.axhline(y=0, color='red', linestyle='--', alpha=0.5)
-                        ax.fill_between(replay_chart['date'], replay_chart['cumulative_pnl'], 0, 
+                        ax.fill_between(replay_subset['date'], replay_cumulative_pnl, 0, 
                                        alpha=0.2, color='#00ff88')
                         ax.set_xlabel('Date')
                         ax.set_ylabel(f'Cumulative P&L ({currency})')
                         ax.set_title(f'Your Journey: First {trades_shown} Trades')
                         ax.grid(True, alpha=0.3)
                         plt.xticks(rotation=45)
-                        plt.tight_layout()
-                        st.pyplot(fig)
+                        show_figure(fig)
                     
                     with col2:
                         st.subheader("📊 Performance Breakdown")
@@ -5413,19 +5583,19 @@ if trades:
                         losses = replay_metrics['losing_trades']
                         
                         if wins + losses > 0:
-                            fig, ax = plt.subplots(figsize=(10, 5))
+                            fig, ax = plt.subplots(figsize=(10, 5), layout='constrained')
                             ax.pie([wins, losses], labels=['Wins', 'Losses'], 
                                   colors=['#00ff88', '#ff4444'],
                                   autopct='%1.1f%%', startangle=90)
                             ax.set_title(f'Win/Loss Ratio at Trade {trades_shown}')
-                            st.pyplot(fig)
+                            show_figure(fig)
                     
                     st.divider()
                     
                     # Trade Timeline Chart - Visual of Entry/Exit points
                     st.subheader("📍 Trade Entry/Exit Timeline")
                     
-                    fig, ax = plt.subplots(figsize=(14, 6))
+                    fig, ax = plt.subplots(figsize=(14, 6), layout='constrained')
                     
                     # Plot each trade with entry and exit points
                     for idx, row in replay_subset.iterrows():
@@ -5472,8 +5642,7 @@ if trades:
                     ax.legend(handles=legend_elements, loc='upper left')
                     
                     plt.xticks(rotation=45)
-                    plt.tight_layout()
-                    st.pyplot(fig)
+                    show_figure(fig)
                     
                     st.caption("""
                     **How to read:**
@@ -5557,8 +5726,7 @@ if trades:
                     week_start, week_end, _ = week_options[selected_week_idx]
                 
                 with col2:
-                    st.write("")
-                    st.write("")
+                    st.markdown(SPACER_HTML, unsafe_allow_html=True)
                     if st.button("📄 Generate Weekly PDF", type="primary", use_container_width=True):
                         with st.spinner("Generating PDF report..."):
                             try:
@@ -5615,8 +5783,7 @@ if trades:
                     year, month, _ = months[selected_month_idx]
                 
                 with col2:
-                    st.write("")
-                    st.write("")
+                    st.markdown(SPACER_HTML, unsafe_allow_html=True)
                     if st.button("📄 Generate Monthly PDF", type="primary", use_container_width=True):
                         with st.spinner("Generating PDF report..."):
                             try:
@@ -5667,8 +5834,7 @@ if trades:
                     report_title = st.text_input("Report Title", value="Custom Trading Report", key="report_title")
                 
                 with col2:
-                    st.write("")
-                    st.write("")
+                    st.markdown(SPACER_HTML, unsafe_allow_html=True)
                     if st.button("📄 Generate Custom PDF", type="primary", use_container_width=True):
                         if custom_start > custom_end:
                             st.error("❌ Start date must be before end date")
@@ -5713,7 +5879,7 @@ if trades:
                             total_pnl = sum(t['pnl'] for t in range_trades)
                             st.metric("Total P&L", f"€{total_pnl:.2f}")
                         with col3:
-                            wins = len([t for t in range_trades if t['pnl'] > 0])
+                            wins = sum(1 for t in range_trades if t['pnl'] > 0)
                             wr = (wins / len(range_trades) * 100) if range_trades else 0
                             st.metric("Win Rate", f"{wr:.1f}%")
                         with col4:
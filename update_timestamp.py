@@ -6,13 +6,13 @@ Updates the LAST_UPDATE timestamp automatically before git commits
 
 import re
 from datetime import datetime
-import pytz
+from zoneinfo import ZoneInfo
 
 def update_last_updated():
     """Update the LAST_UPDATE timestamp in trading_journal.py"""
     
     # Get current time in NL timezone
-    nl_tz = pytz.timezone('Europe/Amsterdam')
+    nl_tz = ZoneInfo('Europe/Amsterdam')
     current_time_nl = datetime.now(nl_tz)
     formatted_time = current_time_nl.strftime('%d-%m-%Y %H:%M:%S')
     